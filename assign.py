@@ -1,323 +1,869 @@
-from typing import List, Tuple
+import csv
+import json
+import random
+import re
+import sys
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
-def read_students_preferences(file_path) -> List[List[str]]:
+# The header names accepted for each column of the students preferences file (compared after normalize_header).
+# If a column is not found in the header, its position in the original survey export is used instead:
+# [timestamp, student_name, student_ID, master_GPA, cureent_GPA, avarage_GPA, 1st preference, 2nd preference,..., 14th preference]
+STUDENT_COLUMNS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    'name': (('student_name', 'name', 'full_name'), 1),
+    'ID': (('student_id', 'id'), 2),
+    'average_GPA': (('average_gpa', 'avarage_gpa', 'avg_gpa', 'average'), 5),
+}
+# The header names accepted for each column of the faculty members file, and their position if they are not found:
+# [faculty_name, current_load, requsted_load]
+FACULTY_COLUMNS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    'name': (('faculty_name', 'name', 'faculty'), 0),
+    'current_load': (('current_load', 'current'), 1),
+    'requested_load': (('requested_load', 'requsted_load', 'requested'), 2),
+}
+# A header is a preference column if, after normalize_header, it is the word preference (or pref, or choice) with an optional number or
+# ordinal before it or a number after it, e.g. "1st Preference", "Second Choice" or "Pref 3". Other headers that only contain one of
+# these words, such as "Preferred Email", are not preference columns.
+PREFERENCE_HEADER = re.compile(r'^((\d+(st|nd|rd|th)?|first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|eleventh|twelfth|'
+                               r'thirteenth|fourteenth|fifteenth)_)?(preference|pref|choice)(_\d+)?$')
+
+
+class StudentRecord(NamedTuple):
+    """
+    A student's row of the students preferences file.
+    """
+    name: str
+    ID: str
+    average_GPA: str
+    preferences: Tuple[str, ...]
+
+    def to_list(self) -> List[str]:
+        """
+        Return the record in the form [student_name, student_ID, average_GPA, 1st preference, 2nd preference, ...].
+        """
+        return [self.name, self.ID, self.average_GPA, *self.preferences]
+
+
+class FacultyRecord(NamedTuple):
+    """
+    A faculty's row of the faculty members file.
+    """
+    name: str
+    current_load: int
+    requested_load: int
+
+    def to_list(self) -> List[str]:
+        """
+        Return the record in the form [faculty_name, current_load, requsted_load].
+        """
+        return [self.name, str(self.current_load), str(self.requested_load)]
+
+
+def normalize_header(header: str) -> str:
+    """
+    Normalize a header name so that "Student ID", "student_id" and " student-ID " are the same column.
+    """
+    return re.sub(r'[^0-9a-z]+', '_', header.strip().lower()).strip('_')
+
+
+def resolve_columns(header: Sequence[str], columns: Dict[str, Tuple[Tuple[str, ...], int]]) -> Dict[str, int]:
+    """
+    Map each column to its index in the header row. A column is found by the first of its accepted names that is in the header,
+    otherwise its default position is used.
+    :param header: The header row of the file.
+    :param columns: A dictionary of column -> (accepted header names, default position).
+    :return: A dictionary of column -> index.
+    """
+    normalized: Dict[str, int] = {}
+    for index, name in enumerate(header):
+        normalized.setdefault(normalize_header(name), index)
+    result: Dict[str, int] = {}
+    for column, (names, position) in columns.items():
+        result[column] = next((normalized[name] for name in names if name in normalized), position)
+    return result
+
+
+def iter_csv_rows(file_path) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Stream the rows of a CSV file one at a time, with quoted fields and CRLF line endings handled by the csv module.
+    Blank lines are skipped and every field is stripped of whitespace.
+    If the file is not found, a message is printed and nothing is yielded.
+    :param file_path: The path to the CSV file.
+    :return: An iterator of (line_number, row), the header row included.
+    """
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            for row in reader:
+                if not any(item.strip() for item in row):
+                    continue
+                yield reader.line_num, [item.strip() for item in row]
+    except FileNotFoundError:
+        print(f"File {file_path} not found or currputed.")
+
+
+def iter_students_preferences(file_path, preference_count: int = 14) -> Iterator[StudentRecord]:
+    """
+    Stream the students preferences from a file, one StudentRecord at a time, so the memory used does not grow with the file.
+    The name, ID and average GPA columns are found by their header names (see STUDENT_COLUMNS), and the preference columns are the
+    first preference_count headers that match PREFERENCE_HEADER. Any other column is ignored.
+    If a student has fewer preferences than preference_count, the missing ones are empty strings.
+    A row without a name or an ID is reported and skipped.
+    :param file_path: The path to the file containing student preferences.
+    :param preference_count: The number of preferences of each student.
+    :return: An iterator of StudentRecord.
+    """
+    rows: Iterator[Tuple[int, List[str]]] = iter_csv_rows(file_path)
+    header: Optional[Tuple[int, List[str]]] = next(rows, None)
+    if header is None:
+        return
+    columns: Dict[str, int] = resolve_columns(header[1], STUDENT_COLUMNS)
+    preference_columns: List[int] = [index for index, name in enumerate(header[1]) if PREFERENCE_HEADER.match(normalize_header(name))]
+    if not preference_columns:
+        # No preference headers, use the positions of the original survey export (right after the average GPA)
+        preference_columns = list(range(columns['average_GPA'] + 1, columns['average_GPA'] + 1 + preference_count))
+    preference_columns = preference_columns[:preference_count]
+    for line_number, row in rows:
+        if len(row) <= max(columns['name'], columns['ID']) or not row[columns['name']] or not row[columns['ID']]:
+            print(f"Skipping malformed row {line_number} in {file_path}: missing student name or ID.")
+            continue
+        preferences: List[str] = [row[index] if index < len(row) else '' for index in preference_columns]
+        preferences.extend([''] * (preference_count - len(preferences)))
+        average_GPA: str = row[columns['average_GPA']] if columns['average_GPA'] < len(row) else ''
+        yield StudentRecord(row[columns['name']], row[columns['ID']], average_GPA, tuple(preferences))
+
+
+def iter_faculties_info(file_path) -> Iterator[FacultyRecord]:
+    """
+    Stream the faculties information from a file, one FacultyRecord at a time.
+    The columns are found by their header names (see FACULTY_COLUMNS). Any other column is ignored.
+    A row without a name or with loads that are not integers is reported and skipped.
+    :param file_path: The path to the file containing faculty information.
+    :return: An iterator of FacultyRecord.
+    """
+    rows: Iterator[Tuple[int, List[str]]] = iter_csv_rows(file_path)
+    header: Optional[Tuple[int, List[str]]] = next(rows, None)
+    if header is None:
+        return
+    columns: Dict[str, int] = resolve_columns(header[1], FACULTY_COLUMNS)
+    for line_number, row in rows:
+        try:
+            name: str = row[columns['name']]
+            current_load: int = int(row[columns['current_load']])
+            requested_load: int = int(row[columns['requested_load']])
+        except (IndexError, ValueError):
+            print(f"Skipping malformed row {line_number} in {file_path}: expected a faculty name, current load and requested load.")
+            continue
+        if not name:
+            print(f"Skipping malformed row {line_number} in {file_path}: missing faculty name.")
+            continue
+        yield FacultyRecord(name, current_load, requested_load)
+
+
+def read_students_preferences(file_path, preference_count: int = 14) -> List[List[str]]:
     """
     Read preferences from a file and return a list of lists each row represents a student references.
-    This function assumes that the file contains lines of comma-separated values.
+    The file is streamed with iter_students_preferences, so the columns are found by their header names and quoted fields are supported.
     Each line represents a student's preferences.
-    If the file is not found or corrupted, it returns an empty list.
+    If the file is not found, it returns an empty list. Malformed rows are reported and skipped.
     :param file_path: The path to the file containing student preferences.
-    :return: A list of lists, where each inner list contains the preferences of a student in the form: 
+    :param preference_count: The number of preferences of each student.
+    :return: A list of lists, where each inner list contains the preferences of a student in the form:
     [student_name, student_ID, average_GPA, 1st preference, 2nd preference, ..., 14th preference].
     """
-    result: List[List[str]] = []  # the result list to store student preferences
-    # Open the file and read its contents
-    # Each line in the file is expected to contain a student's preferences separated by commas
-    # If the file is not found or corrupted, an empty list will be returned
-    # Each line in the file are expected to be in the format:
-    # [timestamp, student_name, student_ID, master_GPA, cureent_GPA, avarage_GPA, 1st preference, 2nd preference,..., 14th preference]
-    try:
-        with open(file_path, 'r') as file:
-            preferences: List[str] = file.read().strip().split('\n')
-            # Skip the header row (first line)
-            for preference in preferences[1:]:
-                # Split each line by commas and strip whitespace
-                temp_student_preferences: List[str] = [item.strip() for item in preference.split(',')]
-                student_preference: List[str] = [temp_student_preferences[1],temp_student_preferences[2],temp_student_preferences[5],temp_student_preferences[6],
-                                       temp_student_preferences[7],temp_student_preferences[8],temp_student_preferences[9],temp_student_preferences[10],
-                                       temp_student_preferences[11],temp_student_preferences[12],temp_student_preferences[13],temp_student_preferences[14],
-                                        temp_student_preferences[15],temp_student_preferences[16],temp_student_preferences[17],temp_student_preferences[18],
-                                        temp_student_preferences[19]]
-                # Append the list of preferences to the result
-                result.append(student_preference)
-    except FileNotFoundError:
-        print(f"File {file_path} not found or currputed.")
-    
-    return result
+    return [student.to_list() for student in iter_students_preferences(file_path, preference_count)]
 
 
 def read_faculties_info(file_path) -> List[List[str]]:
     """
     Read faculty information from a file and return a list of lists each row represents a faculty information.
-    This function assumes that the file contains lines of comma-separated values.
+    The file is streamed with iter_faculties_info, so the columns are found by their header names and quoted fields are supported.
     Each line represents a faculty's information.
-    If the file is not found or corrupted, it returns an empty list.
+    If the file is not found, it returns an empty list. Malformed rows are reported and skipped.
     :param file_path: The path to the file containing faculty information.
-    :return: A list of lists, where each inner list contains the information of a faculty in the form [faculty_name, current_load, requsted_load]   
-    """
-    result: List[List[str]] = []  # the result list to store faculty information
-    # Open the file and read its contents
-    # Each line in the file is expected to contain a faculty's information separated by commas
-    # If the file is not found or corrupted, an empty list will be returned
-    # Each line in the file are expected to be in the format:
-    # [faculty_name, current_load, requsted_load]
-    try:
-        with open(file_path, 'r') as file:
-            info: List[str] = file.read().strip().split('\n')
-            # Skip the header row (first line)
-            for faculty_information in info[1:]:
-                # Split each line by commas and strip whitespace
-                faculty_info_list: List[str] = [item.strip() for item in faculty_information.split(',')]
-                result.append(faculty_info_list)
-    except FileNotFoundError:
-        print(f"File {file_path} not found or currputed.")
-    
-    return result
+    :return: A list of lists, where each inner list contains the information of a faculty in the form [faculty_name, current_load, requsted_load]
+    """
+    return [faculty.to_list() for faculty in iter_faculties_info(file_path)]
+
+
+class LoadBuckets:
+    """
+    A bucket queue of faculty slots keyed by their current load. Loads are small integers, so the least loaded bucket is found by
+    looking at the few distinct loads in the queue, and a slot is added to or removed from its bucket in O(1) when its load changes.
+    Each bucket is a plain list, so a random faculty among the least loaded ones can be picked with random.choice.
+    """
+    __slots__ = ('buckets', 'positions')
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, List[int]] = {}  # load -> slots with that load
+        self.positions: Dict[int, int] = {}  # slot -> position of the slot in its bucket
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, slot: int) -> bool:
+        return slot in self.positions
+
+    def clear(self) -> None:
+        """
+        Remove all the slots from the queue.
+        """
+        self.buckets.clear()
+        self.positions.clear()
+
+    def add(self, slot: int, load: int) -> None:
+        """
+        Add a slot to the bucket of the given load.
+        """
+        bucket: List[int] = self.buckets.setdefault(load, [])
+        self.positions[slot] = len(bucket)
+        bucket.append(slot)
+
+    def remove(self, slot: int, load: int) -> None:
+        """
+        Remove a slot from the bucket of the given load, by moving the last slot of the bucket into its position.
+        """
+        bucket: List[int] = self.buckets[load]
+        position: int = self.positions.pop(slot)
+        last_slot: int = bucket.pop()
+        if last_slot != slot:
+            bucket[position] = last_slot
+            self.positions[last_slot] = position
+        # Drop empty buckets so that the least load is always the smallest key
+        if not bucket:
+            del self.buckets[load]
+
+    def least_load(self) -> Optional[int]:
+        """
+        Return the least load in the queue, or None if the queue is empty.
+        """
+        return min(self.buckets) if self.buckets else None
+
+    def least_loaded(self) -> List[int]:
+        """
+        Return the slots with the least load. The returned list is the bucket itself and must not be modified.
+        """
+        least_load: Optional[int] = self.least_load()
+        return self.buckets[least_load] if least_load is not None else []
+
+
+class FacultyRegistry:
+    """
+    A hash-indexed registry of the faculties information. Each faculty name is mapped to an integer slot, so finding a faculty
+    from a student's preference is O(1) instead of a scan over the whole faculties list. The current and requested loads are kept
+    as integers in compact arrays, so they are not converted from and to strings at every step of the assignment.
+    The original list of lists is kept and updated by sync(), so callers still see the faculties information in the same form.
+    Two LoadBuckets are kept up to date as students are assigned: one with all the faculties, and one with only the faculties that
+    can still take a student in the fallback (current_load < 4 and requested_load > 0).
+    """
+    __slots__ = ('names', 'slots', 'current_load', 'requested_load', 'rows', 'by_load', 'available')
+
+    def __init__(self, faculties_info: List[List[str]]) -> None:
+        """
+        Build the registry from the faculties information.
+        :param faculties_info: A list of lists, where each inner list contains the information of a faculty in the form [faculty_name, current_load, requsted_load].
+        """
+        self.names: List[str] = []  # slot -> faculty name
+        self.slots: Dict[str, int] = {}  # faculty name -> slot
+        self.current_load: array = array('i')  # slot -> current load
+        self.requested_load: array = array('i')  # slot -> requested load
+        self.rows: List[List[str]] = faculties_info  # the original rows, updated by sync()
+        self.by_load: LoadBuckets = LoadBuckets()  # all the faculties keyed by current load
+        self.available: LoadBuckets = LoadBuckets()  # the faculties with current_load < 4 and requested_load > 0 keyed by current load
+        for faculty in faculties_info:
+            # If a name is repeated, the first row wins, the same as the first match of a linear scan
+            self.slots.setdefault(faculty[0], len(self.names))
+            self.names.append(faculty[0])
+            self.current_load.append(int(faculty[1]))
+            self.requested_load.append(int(faculty[2]))
+        for slot in range(len(self.names)):
+            self.by_load.add(slot, self.current_load[slot])
+            if self.is_available(slot):
+                self.available.add(slot, self.current_load[slot])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def slot_of(self, faculty_name: str) -> Optional[int]:
+        """
+        Return the slot of a faculty, or None if there is no faculty with that name.
+        """
+        return self.slots.get(faculty_name)
+
+    def preferred_slots(self, preferences: List[str]) -> Set[int]:
+        """
+        Return the slots of the faculties in a list of preferences. Unknown names are skipped and repeated names are counted once.
+        """
+        return {self.slots[preference] for preference in preferences if preference in self.slots}
+
+    def preference_slots(self, preferences: Sequence[str]) -> List[int]:
+        """
+        Return the slot of each faculty in a list of preferences, in order, with -1 for the names that are not in the registry.
+        """
+        slots: Dict[str, int] = self.slots
+        return [slots.get(preference, -1) for preference in preferences]
+
+    def known_slots(self, slots: Sequence[int]) -> Set[int]:
+        """
+        Return the slots of a list of preference slots that are in the registry (0 <= slot < len(self)), each one counted once.
+        """
+        faculty_count: int = len(self.names)
+        return {slot for slot in slots if 0 <= slot < faculty_count}
+
+    def is_available(self, slot: int) -> bool:
+        """
+        Check if the faculty in the given slot can take a student in the fallback (current_load < 4 and requested_load > 0).
+        """
+        return self.current_load[slot] < 4 and self.requested_load[slot] > 0
+
+    def assign(self, slot: int) -> str:
+        """
+        Take one more student for the faculty in the given slot: the current load is incremented and the requested load is decremented.
+        The faculty is moved to its new bucket in the load queues.
+        :return: The name of the faculty.
+        """
+        self.set_loads(slot, self.current_load[slot] + 1, self.requested_load[slot] - 1)
+        return self.names[slot]
+
+    def release(self, slot: int) -> str:
+        """
+        Give back one student of the faculty in the given slot, the opposite of assign(): the current load is decremented and the
+        requested load is incremented.
+        :return: The name of the faculty.
+        """
+        self.set_loads(slot, self.current_load[slot] - 1, self.requested_load[slot] + 1)
+        return self.names[slot]
+
+    def set_loads(self, slot: int, current_load: int, requested_load: int) -> None:
+        """
+        Set the current and requested loads of the faculty in the given slot, and move it to its new bucket in the load queues.
+        """
+        old_load: int = self.current_load[slot]
+        if slot in self.available:
+            self.available.remove(slot, old_load)
+        self.by_load.remove(slot, old_load)
+        self.current_load[slot] = current_load
+        self.requested_load[slot] = requested_load
+        self.by_load.add(slot, current_load)
+        if self.is_available(slot):
+            self.available.add(slot, current_load)
+
+    def sync(self) -> List[List[str]]:
+        """
+        Write the current and requested loads back to the original list of lists (as strings, the same as they were read).
+        :return: The updated faculties information.
+        """
+        for slot, faculty in enumerate(self.rows):
+            faculty[1] = str(self.current_load[slot])
+            faculty[2] = str(self.requested_load[slot])
+        return self.rows
+
+
+class Instrumentation:
+    """
+    Optional counters and timers of a run: the wall time of each phase (read, assign, stats), the number of students that went through
+    each branch of GreedyAssigner.assign_student, and the number of faculty comparisons made by the assignment.
+    Every event is also passed to the callback, if one is given, as callback(event, data) where event is 'phase' or 'branch'.
+    When no Instrumentation is passed to the assignment, the only cost is a None check at the end of each student.
+    """
+    # The branches of GreedyAssigner.assign_student, in the order they are tried
+    BRANCHES: Tuple[str, ...] = (
+        'preference',  # the first preference with current_load < 3 and requested_load > 0
+        'courtesy',  # the first preference with current_load < 4 and requested_load > 0, for the first student only
+        'least_loaded',  # the least loaded faculty with current_load < 4 and requested_load > 0
+        'preference_among_least_loaded',  # a preference among the least loaded faculties
+        'avoid_future_preferences',  # a random least loaded faculty that no future student wants
+        'least_loaded_random',  # a random least loaded faculty
+        'unassigned',  # no faculty at all
+    )
+
+    def __init__(self, callback: Optional[Callable[[str, Dict], None]] = None) -> None:
+        """
+        :param callback: A function called with (event, data) for each phase and for each student assigned.
+        """
+        self.callback: Optional[Callable[[str, Dict], None]] = callback
+        self.phase_times: Dict[str, float] = {}  # phase -> wall time in seconds
+        self.branch_counts: Dict[str, int] = dict.fromkeys(self.BRANCHES, 0)  # branch -> number of students
+        self.faculty_comparisons: int = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the run, e.g. `with instrumentation.phase('read'): ...`. A phase that runs more than once adds up its times.
+        """
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed: float = time.perf_counter() - start
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed
+            if self.callback is not None:
+                self.callback('phase', {'phase': name, 'seconds': elapsed})
+
+    def record_branch(self, student: Sequence[str], branch: str, comparisons: int) -> None:
+        """
+        Count the branch that a student went through and the faculty comparisons made to get there.
+        """
+        self.branch_counts[branch] += 1
+        self.faculty_comparisons += comparisons
+        if self.callback is not None:
+            self.callback('branch', {'student_name': student[0], 'student_ID': student[1], 'branch': branch, 'comparisons': comparisons})
+
+    def to_dict(self) -> Dict:
+        """
+        :return: The counters and timers as a dictionary that can be saved as JSON.
+        """
+        return {'phase_seconds': dict(self.phase_times), 'branch_counts': dict(self.branch_counts),
+                'faculty_comparisons': self.faculty_comparisons}
 
+    def to_json(self) -> str:
+        """
+        :return: The counters and timers as a JSON string.
+        """
+        return json.dumps(self.to_dict())
 
-def assign_students_to_faculties(students_preferences: List[List[str]], faculties_info: List[List[str]]) -> List[Tuple[str, str, str]]:
+
+class GreedyAssigner:
+    """
+    The state of the greedy assignment of assign_students_to_faculties, so that students can be assigned one at a time: the faculties registry,
+    the courtesy flag, the random number generator used to break ties, and a reference count of the students not processed yet who have
+    each faculty in their preferences (so that checking if a faculty is in the preferences of a future student is O(1)).
     """
-    Assign students to faculties based on their preferences and faculty availability. It will iterate through each student's preferences and assign them based on their preferences to the first available faculty 
-    that still has capacity based on the faculty's requested load and under one condition that the faculty's current load won't surpass 3. If a faculty is already at full capacity, the student will be assigned 
-    to the next preferred faculty. If no faculty is available, the student will assigned to the faculty with the lowest current load with a requested load > 0. If two faculties have the same load and their 
-    requested load is > 0, the student will be assigned to one of them randomly. Whenever a student is assigned to a faculty, the faculty's current load will be updated, and the number of requested load will be 
+    __slots__ = ('registry', 'courtesy', 'future_demand', 'rng', 'instrumentation')
+
+    def __init__(self, registry: FacultyRegistry, future_students: List[List[str]], rng: Optional[random.Random] = None,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param registry: The faculties registry, updated as students are assigned.
+        :param future_students: The students that will be assigned, each one should be passed to remove_future_student before it is assigned.
+        :param rng: The random number generator used to break ties. If not given, the global one is used.
+        :param instrumentation: If given, the branch taken by each student and the faculty comparisons are counted in it.
+        """
+        self.registry: FacultyRegistry = registry
+        self.courtesy: bool = True  # The first student without preferences will be assigned to a faculty from his preferences even if their load is full
+        self.rng: Optional[random.Random] = rng
+        self.instrumentation: Optional[Instrumentation] = instrumentation
+        self.future_demand: array = array('i', [0]) * len(registry)
+        for student in future_students:
+            self.add_future_student(student)
+
+    def add_future_student(self, student: List[str]) -> None:
+        """
+        Count a student that will be assigned later in the future demand.
+        """
+        for slot in self.registry.preferred_slots(student[3:]):
+            self.future_demand[slot] += 1
+
+    def remove_future_student(self, student: List[str]) -> None:
+        """
+        Remove a student from the future demand, once it is being assigned.
+        """
+        for slot in self.registry.preferred_slots(student[3:]):
+            self.future_demand[slot] -= 1
+
+    def add_future_slots(self, preference_slots: Sequence[int]) -> None:
+        """
+        Count a student that will be assigned later in the future demand, from the slots of their preferences.
+        """
+        for slot in self.registry.known_slots(preference_slots):
+            self.future_demand[slot] += 1
+
+    def remove_future_slots(self, preference_slots: Sequence[int]) -> None:
+        """
+        Remove a student from the future demand, from the slots of their preferences, once it is being assigned.
+        """
+        for slot in self.registry.known_slots(preference_slots):
+            self.future_demand[slot] -= 1
+
+    def assign_student(self, student: List[str]) -> Optional[int]:
+        """
+        Assign a student to a faculty with the rules of assign_students_to_faculties, and update the faculty's loads.
+        :param student: The student's preferences in the form [student_name, student_ID, average_GPA, 1st preference, 2nd preference, ...].
+        :return: The slot of the assigned faculty, or None if there is no faculty.
+        """
+        return self.assign_slots(student, self.registry.preference_slots(student[3:]))
+
+    def assign_slots(self, student: Sequence[str], preference_slots: Sequence[int]) -> Optional[int]:
+        """
+        Assign a student to a faculty from the slots of their preferences, the same as assign_student but without looking up the names,
+        so that preferences already interned to integer IDs (see input_cache.py) can be used directly.
+        :param student: The student, only its name and ID (student[0] and student[1]) are used, for the instrumentation.
+        :param preference_slots: The slot of each preference in order, a slot outside of the registry (e.g. -1) is an unknown faculty.
+        :return: The slot of the assigned faculty, or None if there is no faculty.
+        """
+        registry: FacultyRegistry = self.registry
+        faculty_count: int = len(registry)
+        current_load: array = registry.current_load
+        requested_load: array = registry.requested_load
+        instrumentation: Optional[Instrumentation] = self.instrumentation
+        choice = self.rng.choice if self.rng is not None else random.choice
+        # Iterate through each faculty preference of the student
+        for rank, slot in enumerate(preference_slots, 1):
+            # Check if the faculty preference is in the faculties registry
+            if not 0 <= slot < faculty_count:
+                continue
+            # Check if the faculty has capacity to take more students
+            if current_load[slot] < 3 and requested_load[slot] > 0:
+                # Assign the student to the faculty and update the faculty's current load and requested load
+                registry.assign(slot)
+                if instrumentation is not None:
+                    instrumentation.record_branch(student, 'preference', rank)
+                return slot
+            elif current_load[slot] < 4 and requested_load[slot] > 0 and self.courtesy:
+                # Courtesy: If the first student without preferences will be assigned to a faculty from his preferences even if their load is full
+                registry.assign(slot)
+                self.courtesy = False  # Disable courtesy for subsequent students
+                if instrumentation is not None:
+                    instrumentation.record_branch(student, 'courtesy', rank)
+                return slot
+        # The number of faculty comparisons made so far, one for each preference
+        comparisons: int = len(preference_slots)
+        if faculty_count == 0:
+            if instrumentation is not None:
+                instrumentation.record_branch(student, 'unassigned', comparisons)
+            return None
+        # If the student has not been assigned to any faculty, assign them to the faculty with the least current load and requested load > 0
+        # if two faculties have the same current load, and requested load > 0, the student will be assigned to one of them randomly
+        # Check if there are any available faculties (current_load < 4 and requested_load > 0)
+        if registry.available:
+            # Select the faculties with the least current load and requested load > 0
+            candidate_faculties: List[int] = registry.available.least_loaded()
+            # If there are multiple faculties with the same current load, randomly select one of them
+            if len(candidate_faculties) > 1:
+                selected_faculty: int = choice(candidate_faculties)
+            else:
+                # If there is only one faculty with the least current load, select it
+                selected_faculty: int = candidate_faculties[0]
+            # Assign the student to the faculty and update the faculty's current load and requested load
+            registry.assign(selected_faculty)
+            if instrumentation is not None:
+                instrumentation.record_branch(student, 'least_loaded', comparisons)
+            return selected_faculty
+        # Select a faculty with lowest current load randomly if no available faculties with current load < 4
+        least_load: int = registry.by_load.least_load()
+        candidate_faculties: List[int] = registry.by_load.least_loaded()
+        for rank, slot in enumerate(preference_slots, 1):
+            # Check if the faculty preference is in the candidate_faculties list
+            if 0 <= slot < faculty_count and current_load[slot] == least_load:
+                # If the faculty preference is in the candidate faculties, assign the student to that faculty
+                registry.assign(slot)
+                if instrumentation is not None:
+                    instrumentation.record_branch(student, 'preference_among_least_loaded', comparisons + rank)
+                return slot
+        comparisons += len(preference_slots) + len(candidate_faculties)
+        # Filter the candidate faculties to remove those that are in the preferences of a future student
+        candidate_faculties: List[int] = [slot for slot in candidate_faculties if self.future_demand[slot] == 0]
+        branch: str = 'avoid_future_preferences'
+        # If there are no candidate faculties left, select one of the least loaded faculties randomly
+        if not candidate_faculties:
+            candidate_faculties: List[int] = registry.by_load.least_loaded()
+            branch = 'least_loaded_random'
+        selected_faculty: int = choice(candidate_faculties)
+        # Assign the student to the faculty and update the faculty's current load and requested load
+        registry.assign(selected_faculty)
+        if instrumentation is not None:
+            instrumentation.record_branch(student, branch, comparisons)
+        return selected_faculty
+
+
+def assign_students_to_faculties(students_preferences: List[List[str]], faculties_info: List[List[str]], rng: Optional[random.Random] = None,
+                                 instrumentation: Optional[Instrumentation] = None) -> List[Tuple[str, str, str]]:
+    """
+    Assign students to faculties based on their preferences and faculty availability. It will iterate through each student's preferences and assign them based on their preferences to the first available faculty
+    that still has capacity based on the faculty's requested load and under one condition that the faculty's current load won't surpass 3. If a faculty is already at full capacity, the student will be assigned
+    to the next preferred faculty. If no faculty is available, the student will assigned to the faculty with the lowest current load with a requested load > 0. If two faculties have the same load and their
+    requested load is > 0, the student will be assigned to one of them randomly. Whenever a student is assigned to a faculty, the faculty's current load will be updated, and the number of requested load will be
     decremented by one until it reaches zero.
+    The faculties are looked up through a FacultyRegistry, and faculties_info is updated with the new loads before returning.
+    Each student is assigned by GreedyAssigner.assign_student.
     :param students_preferences: A list of lists containing student preferences.
     :param faculties_info: A list of lists containing faculty information.
+    :param rng: The random number generator used to break ties, so that a run can be reproduced from its seed. If not given, the global one is used.
+    :param instrumentation: If given, the branch taken by each student and the faculty comparisons are counted in it.
     :return: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty).
     """
     assignment_result: List[Tuple[str, str, str]] = []  # the result list to store the assignment results
-    assigned_students: List[List[str]] = []  # to keep track of assigned students
-    courtesy: bool = True  # The first student without preferences will be assigned to a faculty from his preferences even if their load is full
+    registry: FacultyRegistry = FacultyRegistry(faculties_info)
+    assigner: GreedyAssigner = GreedyAssigner(registry, students_preferences, rng, instrumentation)
     # Iterate through each student's preferences
     for student in students_preferences:
         student_name: str = student[0]
         student_ID: str = student[1]
-        assigned: bool = False  # Flag to check if the student has been assigned to a faculty
-        # Iterate through each faculty preference of the student
-        for preference in student[3:]:
-            # Check if the faculty preference is in the faculties_info list
-            for faculty in faculties_info:
-                if faculty[0] == preference:
-                    faculty_name: str = faculty[0]
-                    current_load: int = int(faculty[1])
-                    requested_load: int = int(faculty[2])
-                    # Check if the faculty has capacity to take more students
-                    if  current_load < 3 and requested_load > 0:
-                        # Assign the student to the faculty
-                        assignment_result.append((student_name, student_ID, faculty_name))
-                        # Update the faculty's current load and requested load
-                        faculty[1] = str(current_load + 1)
-                        faculty[2] = str(requested_load - 1)
-                        assigned = True
-                        assigned_students.append(student)  # Add the student to the assigned students list
-                        break
-                    elif current_load < 4 and requested_load > 0 and courtesy:
-                        # Courtesy: If the first student without preferences will be assigned to a faculty from his preferences even if their load is full
-                        assignment_result.append((student_name, student_ID, faculty_name))
-                        faculty[1] = str(current_load + 1)
-                        faculty[2] = str(requested_load - 1)
-                        assigned = True
-                        assigned_students.append(student)  # Add the student to the assigned students list
-                        courtesy = False  # Disable courtesy for subsequent students
-                        break
-            if assigned:
-                break
-        # If the student has not been assigned to any faculty, assign them to the faculty with the least current load and requested load > 0
-        # Sort faculties by current load only
-        # if two faculties have the same current load, and requested load > 0, the student will be assigned to one of them randomly
-        if not assigned:
-            # Filter faculties that have capacity to take more students
-            available_faculties: List[List[str]] = [faculty for faculty in faculties_info if int(faculty[1]) < 4 and int(faculty[2]) > 0]
-            # Sort the available faculties by current load
-            available_faculties.sort(key=lambda x: int(x[1]))
-            # Check if there are any available faculties
-            if available_faculties:
-                # Select the faculty with the least current load and requested load > 0
-                candidate_faculties: List[List[str]] = [faculty for faculty in available_faculties if int(faculty[1]) == int(available_faculties[0][1])]
-                # If there are multiple faculties with the same current load, randomly select one of them
-                if len(candidate_faculties) > 1:
-                    import random
-                    selected_faculty: List[str] = random.choice(candidate_faculties)
-                else:
-                    # If there is only one faculty with the least current load, select it
-                    selected_faculty: List[str] = available_faculties[0]
-                faculty_name: str = selected_faculty[0]
-                current_load: int = int(selected_faculty[1])
-                requested_load: int = int(selected_faculty[2])
-                # Assign the student to the faculty
-                assignment_result.append((student_name, student_ID, faculty_name))
-                # Update the faculty's current load and requested load
-                selected_faculty[1] = str(current_load + 1)
-                selected_faculty[2] = str(requested_load - 1)
-                assigned = True
-            else:
-                # Select a faculty with lowest current load randomly if no available faculties with current load < 4 
-                faculties_info.sort(key=lambda x: int(x[1]))
-                candidate_faculties: List[List[str]] = [faculty for faculty in faculties_info if int(faculty[1]) == int(faculties_info[0][1])]
-                for preference in student[3:]:
-                    # Check if the faculty preference is in the candidate_faculties list
-                    if preference in [faculty[0] for faculty in candidate_faculties]:
-                        # If the faculty preference is in the candidate faculties, assign the student to that faculty
-                        selected_faculty: List[str] = next(faculty for faculty in candidate_faculties if faculty[0] == preference)
-                        faculty_name: str = selected_faculty[0]
-                        current_load: int = int(selected_faculty[1])
-                        requested_load: int = int(selected_faculty[2])
-                        # Assign the student to the faculty
-                        assignment_result.append((student_name, student_ID, faculty_name))
-                        # Update the faculty's current load and requested load
-                        selected_faculty[1] = str(current_load + 1)
-                        selected_faculty[2] = str(requested_load - 1)
-                        assigned = True
-                        assigned_students.append(student)  # Add the student to the assigned students list
-                        break
-                if not assigned:
-                    # create a temproray list of all the remaining students
-                    temp_remaining_students: List[List[str]] = [s for s in students_preferences if s not in assigned_students + [student]]
-                    # create a temproray list of all the preferences of all remaining students
-                    # to avoid assigning a faculty that is already in the preferences of a future student
-                    temp_future_preferences: List[str] = []
-                    for future_student in temp_remaining_students:
-                        # Collect future preferences of all remaining students
-                        for temp_pref in future_student[3:]:
-                            if temp_pref not in temp_future_preferences:
-                                temp_future_preferences.append(temp_pref)
-                    # Filter the candidate faculties to remove those that are in the future preferences
-                    candidate_faculties: List[List[str]] = [faculty for faculty in candidate_faculties if faculty[0] not in temp_future_preferences]
-                    # If there are no candidate faculties left, break the loop
-                    if not candidate_faculties:
-                        candidate_faculties: List[List[str]] = [faculty for faculty in faculties_info if int(faculty[1]) == int(faculties_info[0][1])]
-                        import random
-                        selected_faculty: List[str] = random.choice(candidate_faculties)
-                        faculty_name: str = selected_faculty[0]
-                        current_load: int = int(selected_faculty[1])
-                        requested_load: int = int(selected_faculty[2])
-                        # Assign the student to the faculty
-                        assignment_result.append((student_name, student_ID, faculty_name))
-                        # Update the faculty's current load and requested load
-                        selected_faculty[1] = str(current_load + 1)
-                        selected_faculty[2] = str(requested_load - 1)
-                        assigned = True
-                        break
-                    # If there are still candidate faculties left, randomly select one of them 
-                    else:
-                        import random
-                        selected_faculty: List[str] = random.choice(candidate_faculties)
-                        faculty_name: str = selected_faculty[0]
-                        current_load: int = int(selected_faculty[1])
-                        requested_load: int = int(selected_faculty[2])
-                        # Assign the student to the faculty
-                        assignment_result.append((student_name, student_ID, faculty_name))
-                        # Update the faculty's current load and requested load
-                        selected_faculty[1] = str(current_load + 1)
-                        selected_faculty[2] = str(requested_load - 1)
-                        assigned = True
-                        break
-
-        # If the student has not been assigned to any faculty, assign them to the faculty with the least current load randomly
-        if not assigned:
-            print(f"No available faculty for student {student_name} with ID {student_ID}.")  
-    
+        # The current student is no longer a future student
+        assigner.remove_future_student(student)
+        slot: Optional[int] = assigner.assign_student(student)
+        if slot is None:
+            print(f"No available faculty for student {student_name} with ID {student_ID}.")
+        else:
+            assignment_result.append((student_name, student_ID, registry.names[slot]))
+
+    # Write the updated loads back to faculties_info
+    registry.sync()
     # Return the assignment result
     # Each item in the list is a tuple of the form (student_name, student_ID, assigned_faculty)
     return assignment_result
 
 
-def statistics(assignment_result: List[Tuple[str, str, str]], students_preferences: List[List[str]]) -> None:
+class AssignmentStatistics(NamedTuple):
     """
-    Print the statistics of the number of students who get their first preference, second preference, etc. Also, plot a bar chart to show these statistics.
+    The statistics of an assignment result, as computed by compute_statistics.
+    """
+    preference_count: int  # the number of preference ranks (14 for the survey export)
+    preference_counts: Dict[int, int]  # preference rank -> number of students assigned to that preference
+    students_without_preference: List[Tuple[str, str, str]]  # (student_name, student_ID, assigned_faculty) of the students assigned to a faculty not in their preferences
+    students_by_preference: Dict[int, List[Tuple[str, str, str]]]  # preference rank -> (student_name, student_ID, assigned_faculty) of the students assigned to that preference
+
+    @property
+    def total_rank_cost(self) -> int:
+        """
+        The sum of the preference ranks of the assigned faculties, where a faculty not in the student's preferences counts as
+        preference_count + 1. A lower cost is a better assignment, which is how the greedy and optimal solvers are compared.
+        """
+        return (sum(preference * count for preference, count in self.preference_counts.items())
+                + (self.preference_count + 1) * len(self.students_without_preference))
+
+
+def compute_statistics(assignment_result: List[Tuple[str, str, str]], students_preferences: List[List[str]]) -> AssignmentStatistics:
+    """
+    Compute the number of students who get their first preference, second preference, etc. in a single pass over the students.
+    The assignment of each student is found through a (student_name, student_ID) -> assigned_faculty index that is built once.
+    A student who listed the assigned faculty more than once is counted at the first (best) preference only.
+    Students that are not in the assignment result are not counted.
     :param assignment_result: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty).
+    :param students_preferences: A list of lists containing student preferences.
+    :return: The statistics of the assignment result.
     """
-    from collections import Counter
-    import matplotlib.pyplot as plt
+    # Index the assignment result by student, if a student appears more than once the first assignment is used
+    assignments: Dict[Tuple[str, str], str] = {}
+    for student_name, student_ID, assigned_faculty in assignment_result:
+        assignments.setdefault((student_name, student_ID), assigned_faculty)
 
-    # Count the number of students who got their first, second, etc. preferences
-    preference_counts: Counter = Counter()
-    students_without_preference: int = 0
+    preference_count: int = max((len(student) - 3 for student in students_preferences), default=14)
+    preference_counts: Dict[int, int] = {preference: 0 for preference in range(1, preference_count + 1)}
+    students_without_preference: List[Tuple[str, str, str]] = []
+    students_by_preference: Dict[int, List[Tuple[str, str, str]]] = {preference: [] for preference in range(1, preference_count + 1)}
     for student in students_preferences:
         student_name: str = student[0]
         student_ID: str = student[1]
-        assigned_faculty = next((faculty for faculty in assignment_result if faculty[0] == student_name and faculty[1] == student_ID), None)
-        if assigned_faculty:
-            assigned_faculty_name: str = assigned_faculty[2]
+        assigned_faculty_name: Optional[str] = assignments.get((student_name, student_ID))
+        if assigned_faculty_name is None:
+            continue
+        try:
             # Find the index of the assigned faculty in the student's preferences
-            try:
-                preference_index: int = student[3:].index(assigned_faculty_name) + 1  # +1 to count from 1 instead of 0
-                preference_counts[preference_index] += 1
-            except ValueError:
-                # Faculty not in student's preference list (assigned due to fallback algorithm)
-                students_without_preference += 1
-
-    # Print the statistics
-    print("\nStatistics of Student Preferences:")
-    for preference, count in sorted(preference_counts.items()):
-        print(f"Preference {preference}: {count} students")
-    # Print the number of students assigned to faculties not in their preferences
-    print(f"Students assigned to faculty not in their preferences: {students_without_preference}")
-    print()
-    print('-------------')
-    print()
-    
-    # print the names of the students who were assigned to faculties not in their preferences
-    if students_without_preference > 0:
-        print("Students assigned to faculty not in their preferences:")
-        for student in students_preferences:
-            student_name: str = student[0]
-            student_ID: str = student[1]
-            assigned_faculty = next((faculty for faculty in assignment_result if faculty[0] == student_name and faculty[1] == student_ID), None)
-            if assigned_faculty:
-                assigned_faculty_name: str = assigned_faculty[2]
-                if assigned_faculty_name not in student[3:]:
-                    print(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty_name}")
-    
-    # print the names of the students who were assigned to their preferences
-    count_preference:int = 1
-    already_printed: List[str] = []  # To keep track of already printed students
-    # Iterate through preferences 1-14
-    while count_preference <= 14:
-        print(f"\nStudents who were assigned to preference {count_preference}:")
-        for student in students_preferences:
-            student_name: str = student[0]
-            student_ID: str = student[1]
-            assigned_faculty = next((faculty for faculty in assignment_result if faculty[0] == student_name and faculty[1] == student_ID), None)
-            if assigned_faculty:
-                assigned_faculty_name: str = assigned_faculty[2]
-                if assigned_faculty_name == student[count_preference+2]:
-                    if student_name not in already_printed:
-                        already_printed.append(student_name)
-                        # Print the student's name, ID, and assigned faculty
-                        # This is to avoid printing the same student multiple times if they selected the same faculty in multiple preferences
-                        # and were assigned to that faculty
-                        print(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty_name}")
-        count_preference += 1
-
-
-    # Plot a bar chart to show the statistics
+            preference_index: int = student.index(assigned_faculty_name, 3) - 2  # -2 to count from 1 after the name, ID and GPA
+        except ValueError:
+            # Faculty not in student's preference list (assigned due to fallback algorithm)
+            students_without_preference.append((student_name, student_ID, assigned_faculty_name))
+            continue
+        preference_counts[preference_index] += 1
+        students_by_preference[preference_index].append((student_name, student_ID, assigned_faculty_name))
+
+    return AssignmentStatistics(preference_count, preference_counts, students_without_preference, students_by_preference)
+
+
+def print_statistics(stats: AssignmentStatistics) -> None:
+    """
+    Print the statistics of an assignment result: the number of students per preference, the students assigned to a faculty not in
+    their preferences, and the students assigned to each preference.
+    :param stats: The statistics computed by compute_statistics.
+    """
+    # The lines are collected and written at once, which is much faster than one print per line on an unbuffered stream
+    lines: List[str] = ["\nStatistics of Student Preferences:"]
+    for preference, count in stats.preference_counts.items():
+        if count > 0:
+            lines.append(f"Preference {preference}: {count} students")
+    # The number of students assigned to faculties not in their preferences
+    lines.append(f"Students assigned to faculty not in their preferences: {len(stats.students_without_preference)}")
+    lines.append(f"Total rank cost: {stats.total_rank_cost}")
+    lines += ['', '-------------', '']
+
+    # The names of the students who were assigned to faculties not in their preferences
+    if stats.students_without_preference:
+        lines.append("Students assigned to faculty not in their preferences:")
+        for student_name, student_ID, assigned_faculty_name in stats.students_without_preference:
+            lines.append(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty_name}")
+
+    # The names of the students who were assigned to their preferences
+    for preference, students in stats.students_by_preference.items():
+        lines.append(f"\nStudents who were assigned to preference {preference}:")
+        for student_name, student_ID, assigned_faculty_name in students:
+            lines.append(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty_name}")
+    print('\n'.join(lines))
+
+
+def plot_statistics(stats: AssignmentStatistics, chart_path: Optional[str] = None) -> None:
+    """
+    Plot a bar chart of the number of students per preference, with the students assigned to a faculty not in their preferences at position 0.
+    If chart_path is given, the chart is rendered to that file without a display (plt.show() is not called), so it works on a headless server.
+    Otherwise, the chart is shown in a window.
+    :param stats: The statistics computed by compute_statistics.
+    :param chart_path: The path of the image file to save the chart to (the format is taken from the extension, e.g. .png or .svg).
+    """
     # Create lists for preferences 1-14, then add position 0 for students without preferences
-    x_positions = list(range(1, 15)) + [0]  # 1-14 for preferences, then 0 for no preference
-    y_values = []
-    
-    # Add counts for preferences 1-14
-    for i in range(1, 15):
-        y_values.append(preference_counts.get(i, 0))
-    
-    # Add count for students without preferences at the end (position 0)
-    y_values.append(students_without_preference)
-    
-    plt.bar(x_positions, y_values)
-    plt.xlabel('Preference (1-14 = Preference rank, 0 = Not in preferences)')
-    plt.ylabel('Number of Students')
-    plt.title('Statistics of Student Preferences')
-    plt.xticks(x_positions)
-    plt.show()
+    x_positions: List[int] = list(range(1, stats.preference_count + 1)) + [0]
+    y_values: List[int] = [stats.preference_counts[preference] for preference in range(1, stats.preference_count + 1)]
+    y_values.append(len(stats.students_without_preference))
+
+    if chart_path is not None:
+        # A Figure that is not created through pyplot does not need a GUI backend
+        from matplotlib.figure import Figure
+        figure = Figure()
+        axes = figure.subplots()
+    else:
+        import matplotlib.pyplot as plt
+        figure, axes = plt.subplots()
+    axes.bar(x_positions, y_values)
+    axes.set_xlabel(f'Preference (1-{stats.preference_count} = Preference rank, 0 = Not in preferences)')
+    axes.set_ylabel('Number of Students')
+    axes.set_title('Statistics of Student Preferences')
+    axes.set_xticks(x_positions)
+    if chart_path is not None:
+        figure.savefig(chart_path)
+    else:
+        plt.show()
+
+
+def statistics(assignment_result: List[Tuple[str, str, str]], students_preferences: List[List[str]], chart_path: Optional[str] = None) -> AssignmentStatistics:
+    """
+    Print the statistics of the number of students who get their first preference, second preference, etc. Also, plot a bar chart to show these statistics.
+    :param assignment_result: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty).
+    :param students_preferences: A list of lists containing student preferences.
+    :param chart_path: If given, the bar chart is saved to this file instead of being shown.
+    :return: The statistics of the assignment result.
+    """
+    stats: AssignmentStatistics = compute_statistics(assignment_result, students_preferences)
+    print_statistics(stats)
+    plot_statistics(stats, chart_path)
+    return stats
+
+
+# The CSV columns and the JSON keys of the assignments file written by write_assignments
+ASSIGNMENT_FIELDS: Tuple[Tuple[str, str], ...] = (('Student Name', 'student_name'), ('Student ID', 'student_ID'), ('Assigned Faculty', 'assigned_faculty'))
+# The CSV columns (the same as faculty_members.csv) and the JSON keys of the faculties file written by write_faculties_info
+FACULTY_FIELDS: Tuple[Tuple[str, str], ...] = (('Faculty Name', 'faculty_name'), ('Current Load', 'current_load'), ('Requested Load', 'requested_load'))
+# The size of the write buffer of the output files
+OUTPUT_BUFFER_SIZE: int = 1 << 20
+
+
+def write_records(file_path, header: Sequence[Tuple[str, str]], rows: Iterable[Sequence]) -> None:
+    """
+    Write rows to a file in one buffered pass, as JSON lines if the path ends with .jsonl and as CSV (with a header) otherwise.
+    :param file_path: The path of the file.
+    :param header: The (CSV column, JSON key) of each field of the rows.
+    :param rows: The rows, each one with a value for each field of the header.
+    """
+    with open(file_path, 'w', newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as file:
+        if str(file_path).endswith('.jsonl'):
+            keys: List[str] = [key for _, key in header]
+            file.writelines(json.dumps(dict(zip(keys, row))) + '\n' for row in rows)
+        else:
+            writer = csv.writer(file)
+            writer.writerow([column for column, _ in header])
+            writer.writerows(rows)
+
+
+def write_assignments(assignment_result: List[Tuple[str, str, str]], file_path) -> None:
+    """
+    Write an assignment result to a CSV or JSON lines file (see write_records).
+    :param assignment_result: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty).
+    :param file_path: The path of the file.
+    """
+    write_records(file_path, ASSIGNMENT_FIELDS, assignment_result)
+
+
+def write_faculties_info(faculties_info: List[List[str]], file_path) -> None:
+    """
+    Write the faculties information with their updated loads to a CSV or JSON lines file (see write_records). The loads are numbers in the
+    JSON lines, and the CSV file has the layout of faculty_members.csv, so it can be the input of the next run.
+    :param faculties_info: A list of lists containing faculty information.
+    :param file_path: The path of the file.
+    """
+    write_records(file_path, FACULTY_FIELDS, ([faculty[0], int(faculty[1]), int(faculty[2])] for faculty in faculties_info))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    The command-line entry point: read the inputs, assign the students with the chosen solver, and write the assignments, the updated
+    faculties information and the statistics. Only the modules that the chosen options need are imported: the other solvers, the input
+    cache and matplotlib are imported when they are used.
+    :param argv: The command-line arguments, sys.argv[1:] if not given.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Assign students to faculties from their preferences and the faculties' loads.")
+    parser.add_argument('--students', default='Students_Preferences.csv', help="path of the students preferences file")
+    parser.add_argument('--faculties', default='faculty_members.csv', help="path of the faculty members file")
+    parser.add_argument('--preferences', type=int, default=14, help="number of preferences of each student")
+    parser.add_argument('--solver', choices=['greedy', 'optimal', 'monte-carlo'], default='greedy',
+                        help="greedy assignment in the order of the file, optimal min-cost flow, or the best of several seeded greedy runs")
+    parser.add_argument('--seed', type=int, help="seed of the random tie-breaks (of the first run for monte-carlo)")
+    parser.add_argument('--runs', type=int, default=100, help="number of runs of the monte-carlo solver")
+    parser.add_argument('--processes', type=int, help="number of worker processes of the monte-carlo solver, all the cores if not given")
+    parser.add_argument('--cache', action='store_true', help="read the inputs through a memory-mapped cache (greedy solver only)")
+    parser.add_argument('--cache-path', help="path of the cache file, by default the students preferences file with a .cache suffix")
+    parser.add_argument('--assignments-output', help="write the assignments to this .csv or .jsonl file instead of the standard output")
+    parser.add_argument('--faculties-output', help="write the updated faculties to this .csv or .jsonl file instead of the standard output")
+    parser.add_argument('--no-statistics', action='store_true', help="do not print the statistics")
+    parser.add_argument('--chart', help="save the statistics chart to this image file (e.g. .png or .svg) instead of showing it")
+    parser.add_argument('--no-plot', action='store_true', help="do not show the statistics chart (matplotlib is not imported)")
+    parser.add_argument('--metrics', help="save the phase timings and the branch counts of the greedy solver to this JSON file")
+    args = parser.parse_args(argv)
+    if (args.cache or args.cache_path) and args.solver != 'greedy':
+        parser.error("--cache only works with the greedy solver")
+
+    instrumentation: Optional[Instrumentation] = Instrumentation() if args.metrics else None
+    phase = instrumentation.phase if instrumentation is not None else (lambda name: nullcontext())
+    rng: Optional[random.Random] = random.Random(args.seed) if args.seed is not None else None
+    if args.cache or args.cache_path:
+        from input_cache import assign_cached_students, compute_cached_statistics, load_inputs
+        with phase('read'):
+            inputs = load_inputs(args.students, args.faculties, args.cache_path, args.preferences)
+        with inputs:
+            with phase('assign'):
+                assigned, faculties_info = assign_cached_students(inputs, rng, instrumentation)
+                assignment_result: List[Tuple[str, str, str]] = inputs.assignment_result(assigned)
+            with phase('stats'):
+                stats: AssignmentStatistics = compute_cached_statistics(inputs, assigned)
+    else:
+        with phase('read'):
+            students_preferences: List[List[str]] = read_students_preferences(args.students, args.preferences)
+            faculties_info: List[List[str]] = read_faculties_info(args.faculties)
+        with phase('assign'):
+            if args.solver == 'optimal':
+                from optimal import assign_students_optimally
+                assignment_result = assign_students_optimally(students_preferences, faculties_info)
+            elif args.solver == 'monte-carlo':
+                from monte_carlo import run_monte_carlo
+                result = run_monte_carlo(students_preferences, faculties_info, args.runs, args.seed or 0, args.processes)
+                assignment_result, faculties_info = result.assignment_result, result.faculties_info
+                print(f"Best of {args.runs} runs: seed {result.best_run.seed}, total rank cost {result.best_run.total_rank_cost}")
+            else:
+                assignment_result = assign_students_to_faculties(students_preferences, faculties_info, rng, instrumentation)
+        with phase('stats'):
+            stats = compute_statistics(assignment_result, students_preferences)
+
+    with phase('write'):
+        if args.assignments_output:
+            write_assignments(assignment_result, args.assignments_output)
+        else:
+            sys.stdout.writelines(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty}\n"
+                                  for student_name, student_ID, assigned_faculty in assignment_result)
+        if args.faculties_output:
+            write_faculties_info(faculties_info, args.faculties_output)
+        else:
+            print("\nUpdated Faculty Information:")
+            sys.stdout.writelines(f"Faculty: {faculty[0]}, Current Load: {faculty[1]}, Requested Load: {faculty[2]}\n" for faculty in faculties_info)
+        if not args.no_statistics:
+            print_statistics(stats)
+    if args.chart:
+        plot_statistics(stats, args.chart)
+    elif not args.no_plot:
+        plot_statistics(stats)
+    if instrumentation is not None:
+        with open(args.metrics, 'w', encoding='utf-8') as file:
+            file.write(instrumentation.to_json())
 
 
 if __name__ == "__main__":
-    # read the student preferences and faculty information from the specified files
-    students_preferences: List[List[str]] = read_students_preferences('Students_Preferences.csv')
-    faculties_info: List[List[str]] = read_faculties_info('faculty_members.csv')
-
-    # the result list to store the assignment results; each item in the list is a tuple of the form (student_name, student_ID, assigned_faculty)
-    assignment_result: List[Tuple[str, str, str]] = assign_students_to_faculties(students_preferences, faculties_info) 
-    
-    # Print the assignment results
-    for student_name, student_ID, assigned_faculty in assignment_result:
-        print(f"Student: {student_name}, ID: {student_ID}, Assigned Faculty: {assigned_faculty}")
-    
-    # Print the updated faculties information
-    print("\nUpdated Faculty Information:")
-    for faculty in faculties_info:
-        print(f"Faculty: {faculty[0]}, Current Load: {faculty[1]}, Requested Load: {faculty[2]}")
-
-    # Show the statistics of the assignment results
-    statistics(assignment_result, students_preferences)
+    main()
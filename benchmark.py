@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from assign import (assign_students_to_faculties, compute_statistics, print_statistics, read_faculties_info,
+                    read_students_preferences)
+from generate_data import write_cohort
+
+
+def time_call(function: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Time a call `repeat` times.
+    :return: The wall times of the calls, in seconds.
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_commit() -> Optional[str]:
+    """
+    Return the commit of the working tree, so that results can be compared between commits, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_size(student_count: int, faculty_count: int, repeat: int, skew: float, tightness: float, oversubscription: float,
+                   seed: int, solvers: List[str]) -> Dict[str, List[float]]:
+    """
+    Time each stage on a synthetic cohort: reading both files, the assignment (once per solver) and the statistics.
+    Each assignment works on a fresh copy of the faculties information, and the output of the stages is discarded.
+    :return: A dictionary of stage -> wall times of the runs, in seconds.
+    """
+    stages: Dict[str, List[float]] = {}
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        students_path: str = os.path.join(directory, 'Students_Preferences.csv')
+        faculties_path: str = os.path.join(directory, 'faculty_members.csv')
+        write_cohort(students_path, faculties_path, student_count, faculty_count, skew, tightness, oversubscription, seed=seed)
+
+        stages['read_students_preferences'] = time_call(lambda: read_students_preferences(students_path), repeat)
+        stages['read_faculties_info'] = time_call(lambda: read_faculties_info(faculties_path), repeat)
+        students_preferences: List[List[str]] = read_students_preferences(students_path)
+        faculties_info: List[List[str]] = read_faculties_info(faculties_path)
+
+        assignment_result = assign_students_to_faculties(students_preferences, [list(faculty) for faculty in faculties_info], random.Random(seed))
+        for solver in solvers:
+            if solver == 'greedy':
+                run_solver = lambda: assign_students_to_faculties(students_preferences, [list(faculty) for faculty in faculties_info], random.Random(seed))
+            else:
+                from optimal import assign_students_optimally
+                run_solver = lambda: assign_students_optimally(students_preferences, [list(faculty) for faculty in faculties_info])
+            stages[f'assign_students_to_faculties[{solver}]'] = time_call(run_solver, repeat)
+
+        stages['compute_statistics'] = time_call(lambda: compute_statistics(assignment_result, students_preferences), repeat)
+        stats = compute_statistics(assignment_result, students_preferences)
+        stages['print_statistics'] = time_call(lambda: print_statistics(stats), repeat)
+    return stages
+
+
+def run_benchmarks(sizes: List[int], faculty_ratio: float, repeat: int, skew: float, tightness: float, oversubscription: float,
+                   seed: int, solvers: List[str]) -> Dict:
+    """
+    Run benchmark_size for each number of students, with faculty_ratio students per faculty.
+    :return: The results, with the commit and the Python version, ready to be saved as JSON.
+    """
+    results: List[Dict] = []
+    for student_count in sizes:
+        faculty_count: int = max(1, round(student_count / faculty_ratio))
+        stages: Dict[str, List[float]] = benchmark_size(student_count, faculty_count, repeat, skew, tightness, oversubscription, seed, solvers)
+        for stage, times in stages.items():
+            results.append({'students': student_count, 'faculties': faculty_count, 'stage': stage,
+                            'best': min(times), 'median': sorted(times)[len(times) // 2], 'times': times})
+            print(f"{student_count:>7} students {faculty_count:>6} faculties  {stage:<45} best {min(times):.4f}s")
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {'faculty_ratio': faculty_ratio, 'repeat': repeat, 'skew': skew, 'tightness': tightness,
+                       'oversubscription': oversubscription, 'seed': seed, 'solvers': solvers},
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the reader, assignment and statistics stages on synthetic cohorts of growing sizes.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000], help="numbers of students")
+    parser.add_argument('--faculty-ratio', type=float, default=3.0, help="number of students per faculty")
+    parser.add_argument('--repeat', type=int, default=3, help="number of timed runs of each stage")
+    parser.add_argument('--skew', type=float, default=1.0, help="exponent of the Zipf-like popularity of the faculties")
+    parser.add_argument('--tightness', type=float, default=1.1, help="total requested load divided by the number of students")
+    parser.add_argument('--oversubscription', type=float, default=0.1, help="share of students who only list the most popular faculties")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic cohorts and of the tie-breaks")
+    parser.add_argument('--solvers', nargs='+', choices=['greedy', 'optimal'], default=['greedy'], help="assignment solvers to time")
+    parser.add_argument('--output', default='benchmark_results.json', help="path of the JSON file to save the results to")
+    args = parser.parse_args()
+    report: Dict = run_benchmarks(args.sizes, args.faculty_ratio, args.repeat, args.skew, args.tightness, args.oversubscription,
+                                  args.seed, args.solvers)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,109 @@
+import argparse
+import csv
+import random
+from typing import Dict, List, Tuple
+
+# The header of the faculty members file, as read by read_faculties_info
+FACULTY_HEADER: List[str] = ['Faculty Name', 'Current Load', 'Requested Load']
+
+
+def ordinal(number: int) -> str:
+    """
+    Return the ordinal of a number: 1st, 2nd, 3rd, 4th, ..., 11th, 12th, 13th, ..., 21st, ...
+    """
+    if 10 <= number % 100 <= 20:
+        return f'{number}th'
+    return f"{number}{({1: 'st', 2: 'nd', 3: 'rd'}).get(number % 10, 'th')}"
+
+
+def students_header(preference_count: int = 14) -> List[str]:
+    """
+    The header of the students preferences file, in the layout of the survey export read by read_students_preferences.
+    """
+    return (['Timestamp', 'Student Name', 'Student ID', 'Master GPA', 'Current GPA', 'Average GPA']
+            + [f'{ordinal(rank)} Preference' for rank in range(1, preference_count + 1)])
+
+
+def generate_cohort(student_count: int, faculty_count: int, skew: float = 1.0, tightness: float = 1.1, oversubscription: float = 0.1,
+                    preference_count: int = 14, seed: int = 0) -> Tuple[List[List[str]], List[List[str]]]:
+    """
+    Generate a reproducible synthetic cohort of students and faculties.
+    The popularity of the faculties follows a Zipf-like law: the faculty of popularity rank r is picked with a weight of 1 / r ** skew.
+    :param student_count: The number of students.
+    :param faculty_count: The number of faculties.
+    :param skew: The exponent of the popularity law, 0 for faculties that are all equally popular.
+    :param tightness: The total requested load of the faculties divided by the number of students, below 1 there are not enough places.
+    :param oversubscription: The share of the students who only list the most popular faculties, which fills them up early and sends
+    the later students to the fallback paths of the assignment.
+    :param preference_count: The number of preferences of each student.
+    :param seed: The seed of the random number generator, the same arguments always give the same cohort.
+    :return: The rows of the students preferences file and of the faculty members file, without their headers.
+    """
+    if faculty_count < 1:
+        raise ValueError("faculty_count must be at least 1")
+    rng: random.Random = random.Random(seed)
+    faculty_names: List[str] = [f'Faculty {index:0{len(str(faculty_count))}d}' for index in range(1, faculty_count + 1)]
+
+    # Spread the total requested load evenly over the faculties
+    total_requested: int = round(tightness * student_count)
+    faculties: List[List[str]] = []
+    requested_loads: List[int] = [total_requested // faculty_count] * faculty_count
+    for index in rng.sample(range(faculty_count), total_requested % faculty_count):
+        requested_loads[index] += 1
+    for index, name in enumerate(faculty_names):
+        faculties.append([name, str(rng.choice((0, 0, 1, 1, 2))), str(requested_loads[index])])
+
+    weights: List[float] = [1 / (rank + 1) ** skew for rank in range(faculty_count)]
+    # The number of distinct faculties in each student's preferences, and the number of the most popular faculties
+    distinct_count: int = min(faculty_count, preference_count)
+    students: List[List[str]] = []
+    for index in range(1, student_count + 1):
+        if rng.random() < oversubscription:
+            # An oversubscribing student lists the most popular faculties only
+            preferences: List[str] = rng.sample(faculty_names[:distinct_count], distinct_count)
+        else:
+            picked: Dict[str, None] = {}
+            while len(picked) < distinct_count:
+                for name in rng.choices(faculty_names, weights, k=distinct_count - len(picked)):
+                    picked[name] = None
+            preferences = list(picked)
+        # With fewer faculties than preferences, the remaining preferences repeat earlier ones
+        preferences.extend(rng.choices(preferences, k=preference_count - len(preferences)))
+        master_GPA: float = round(rng.uniform(3.0, 5.0), 2)
+        current_GPA: float = round(rng.uniform(3.0, 5.0), 2)
+        students.append([f'2024-01-{rng.randint(1, 28):02d} {rng.randint(8, 20):02d}:{rng.randint(0, 59):02d}:00',
+                         f'Student {index}', f'{4000000 + index}', f'{master_GPA:.2f}', f'{current_GPA:.2f}',
+                         f'{(master_GPA + current_GPA) / 2:.2f}'] + preferences)
+    return students, faculties
+
+
+def write_cohort(students_path, faculties_path, student_count: int, faculty_count: int, skew: float = 1.0, tightness: float = 1.1,
+                 oversubscription: float = 0.1, preference_count: int = 14, seed: int = 0) -> None:
+    """
+    Generate a synthetic cohort with generate_cohort and write it in the layouts of Students_Preferences.csv and faculty_members.csv.
+    """
+    students, faculties = generate_cohort(student_count, faculty_count, skew, tightness, oversubscription, preference_count, seed)
+    with open(students_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(students_header(preference_count))
+        writer.writerows(students)
+    with open(faculties_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FACULTY_HEADER)
+        writer.writerows(faculties)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic cohort in the layouts of Students_Preferences.csv and faculty_members.csv.")
+    parser.add_argument('--students', type=int, default=1000, help="number of students")
+    parser.add_argument('--faculties', type=int, default=300, help="number of faculties")
+    parser.add_argument('--skew', type=float, default=1.0, help="exponent of the Zipf-like popularity of the faculties")
+    parser.add_argument('--tightness', type=float, default=1.1, help="total requested load divided by the number of students")
+    parser.add_argument('--oversubscription', type=float, default=0.1, help="share of students who only list the most popular faculties")
+    parser.add_argument('--preferences', type=int, default=14, help="number of preferences of each student")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random number generator")
+    parser.add_argument('--students-output', default='Students_Preferences.csv', help="path of the students preferences file")
+    parser.add_argument('--faculties-output', default='faculty_members.csv', help="path of the faculty members file")
+    args = parser.parse_args()
+    write_cohort(args.students_output, args.faculties_output, args.students, args.faculties, args.skew, args.tightness,
+                 args.oversubscription, args.preferences, args.seed)
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from assign import (AssignmentStatistics, FacultyRegistry, GreedyAssigner, Instrumentation, iter_faculties_info,
+                    iter_students_preferences)
+
+# The layout of a cache file:
+#   header    magic, format version, offset and length of the metadata
+#   offsets   int64 offsets into the strings section, 3 per student (name, ID, average GPA) and one for the end
+#   strings   the UTF-8 bytes of the names, IDs and average GPAs of the students, one after the other
+#   matrix    the preferences as a student_count x preference_count int16 matrix of faculty IDs, -1 for an empty preference
+#   metadata  JSON: the stamps of the source files, the interned faculty names, the faculties rows and the positions of the sections
+# The offsets and the matrix are written in the native byte order, so that they can be used in place through memoryview.cast.
+CACHE_MAGIC: bytes = b'STFCACHE'
+CACHE_VERSION: int = 1
+HEADER: struct.Struct = struct.Struct('<8sIQQ')
+# The largest faculty ID, so that every ID fits in an int16
+MAX_FACULTY_IDS: int = 2 ** 15 - 1
+
+
+def _align(file, boundary: int = 8) -> int:
+    """
+    Pad a file being written with zeros up to the next multiple of boundary, and return the new position.
+    """
+    position: int = file.tell()
+    padding: int = -position % boundary
+    file.write(b'\0' * padding)
+    return position + padding
+
+
+def file_stamp(file_path) -> Dict:
+    """
+    Return the stamp of a source file: its absolute path, its size, its modification time and the SHA-256 of its contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    status: os.stat_result = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': status.st_size, 'mtime_ns': status.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+
+def stamp_matches(stamp: Dict, file_path) -> bool:
+    """
+    Check if a source file is unchanged since its stamp was taken. The size and modification time are checked first, and the file is only
+    hashed when its modification time changed but not its size, so that a file that was touched or copied does not rebuild the cache.
+    """
+    try:
+        status: os.stat_result = os.stat(file_path)
+    except OSError:
+        return False
+    if stamp['path'] != os.path.abspath(file_path) or stamp['size'] != status.st_size:
+        return False
+    if stamp['mtime_ns'] == status.st_mtime_ns:
+        return True
+    return file_stamp(file_path)['sha256'] == stamp['sha256']
+
+
+def build_cache(students_path, faculties_path, cache_path, preference_count: int = 14) -> None:
+    """
+    Parse both CSV files once with the streaming readers and write them to a cache file (see the layout above).
+    Faculty IDs are the rows of the faculty members file (a repeated name is interned to its first row, the same as FacultyRegistry),
+    followed by the names that only appear in the students preferences. The file is written next to cache_path and then renamed,
+    so that a run that is interrupted never leaves a partial cache behind.
+    :param students_path: The path to the file containing student preferences.
+    :param faculties_path: The path to the file containing faculty information.
+    :param cache_path: The path of the cache file.
+    :param preference_count: The number of preferences of each student.
+    """
+    # The stamps are taken before parsing, so that a file changed while it is parsed is seen as changed by the next run
+    stamps: List[Dict] = [file_stamp(students_path), file_stamp(faculties_path)]
+    faculties: List[List] = [[faculty.name, faculty.current_load, faculty.requested_load] for faculty in iter_faculties_info(faculties_path)]
+    faculty_names: List[str] = [faculty[0] for faculty in faculties]
+    if len(faculty_names) > MAX_FACULTY_IDS + 1:
+        raise ValueError(f"Too many faculties to cache as int16 IDs (more than {MAX_FACULTY_IDS + 1}).")
+    faculty_ids: Dict[str, int] = {}
+    for faculty_id, name in enumerate(faculty_names):
+        faculty_ids.setdefault(name, faculty_id)
+
+    offsets: array = array('q', [0])
+    strings: bytearray = bytearray()
+    matrix: array = array('h')
+    student_count: int = 0
+    for student in iter_students_preferences(students_path, preference_count):
+        for value in (student.name, student.ID, student.average_GPA):
+            strings += value.encode('utf-8')
+            offsets.append(len(strings))
+        for preference in student.preferences:
+            if not preference:
+                matrix.append(-1)
+                continue
+            faculty_id: Optional[int] = faculty_ids.get(preference)
+            if faculty_id is None:
+                # A name that is not in the faculty members file keeps its own ID, so that the preferences can be read back as they were
+                faculty_id = faculty_ids[preference] = len(faculty_names)
+                faculty_names.append(preference)
+                if faculty_id > MAX_FACULTY_IDS:
+                    raise ValueError(f"Too many distinct faculty names to cache as int16 IDs (more than {MAX_FACULTY_IDS + 1}).")
+            matrix.append(faculty_id)
+        student_count += 1
+
+    temporary_path: str = f'{cache_path}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(b'\0' * HEADER.size)
+        offsets_start: int = _align(file)
+        file.write(offsets.tobytes())
+        strings_start: int = _align(file)
+        file.write(strings)
+        matrix_start: int = _align(file)
+        file.write(matrix.tobytes())
+        metadata_start: int = _align(file)
+        metadata: bytes = json.dumps({
+            'byteorder': sys.byteorder,
+            'sources': {'students': stamps[0], 'faculties': stamps[1]},
+            'preference_count': preference_count,
+            'student_count': student_count,
+            'faculties': faculties,
+            'faculty_names': faculty_names,
+            'offsets_start': offsets_start,
+            'strings_start': strings_start,
+            'strings_length': len(strings),
+            'matrix_start': matrix_start,
+        }, separators=(',', ':')).encode('utf-8')
+        file.write(metadata)
+        file.seek(0)
+        file.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, metadata_start, len(metadata)))
+    os.replace(temporary_path, cache_path)
+
+
+class CachedInputs:
+    """
+    The students preferences and faculties information of a cache file, memory-mapped instead of parsed: the preferences are a
+    student_count x preference_count int16 matrix of faculty IDs, and the names, IDs and GPAs of the students are only decoded when asked
+    for, so a run only touches the pages it needs. The faculty IDs below faculty_count are the slots of a FacultyRegistry built from
+    faculties_info(), so they can be passed to GreedyAssigner.assign_slots as they are.
+    Close it (or use it in a with statement) to release the memory map.
+    """
+
+    def __init__(self, cache_path) -> None:
+        """
+        Open a cache file written by build_cache.
+        :param cache_path: The path of the cache file.
+        """
+        self.path = cache_path
+        with open(cache_path, 'rb') as file:
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, metadata_start, metadata_length = HEADER.unpack_from(self._map, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            self._map.close()
+            raise ValueError(f"{cache_path} is not a cache file of version {CACHE_VERSION}.")
+        self.metadata: Dict = json.loads(self._map[metadata_start:metadata_start + metadata_length])
+        self.student_count: int = self.metadata['student_count']
+        self.preference_count: int = self.metadata['preference_count']
+        self.faculty_names: List[str] = self.metadata['faculty_names']  # faculty ID -> name
+        self.faculty_count: int = len(self.metadata['faculties'])  # the IDs from faculty_count on are names that are not faculties
+        view: memoryview = memoryview(self._map)
+        offsets_start: int = self.metadata['offsets_start']
+        strings_start: int = self.metadata['strings_start']
+        matrix_start: int = self.metadata['matrix_start']
+        self._offsets: memoryview = view[offsets_start:offsets_start + 8 * (3 * self.student_count + 1)].cast('q')
+        self._strings: memoryview = view[strings_start:strings_start + self.metadata['strings_length']]
+        self.preferences: memoryview = view[matrix_start:matrix_start + 2 * self.student_count * self.preference_count].cast('h')
+        view.release()
+
+    def __len__(self) -> int:
+        return self.student_count
+
+    def __enter__(self) -> 'CachedInputs':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the views of the memory map and close it.
+        """
+        for view in (self._offsets, self._strings, self.preferences):
+            view.release()
+        self._map.close()
+
+    def is_fresh(self, students_path, faculties_path, preference_count: int = 14) -> bool:
+        """
+        Check if the cache was built from these source files, unchanged, with the same number of preferences and on a machine with the
+        same byte order.
+        """
+        sources: Dict = self.metadata['sources']
+        return (self.metadata['byteorder'] == sys.byteorder and self.preference_count == preference_count
+                and stamp_matches(sources['students'], students_path) and stamp_matches(sources['faculties'], faculties_path))
+
+    def student(self, index: int) -> Tuple[str, str, str]:
+        """
+        Return the (student_name, student_ID, average_GPA) of a student, decoded from the strings section.
+        """
+        offsets: memoryview = self._offsets
+        start: int = 3 * index
+        return tuple(bytes(self._strings[offsets[start + field]:offsets[start + field + 1]]).decode('utf-8') for field in range(3))
+
+    def preference_ids(self, index: int) -> memoryview:
+        """
+        Return the faculty IDs of a student's preferences, a view of the row of the matrix (-1 for an empty preference).
+        """
+        return self.preferences[index * self.preference_count:(index + 1) * self.preference_count]
+
+    def faculties_info(self) -> List[List[str]]:
+        """
+        :return: A new list of lists containing faculty information, in the form [faculty_name, current_load, requsted_load].
+        """
+        return [[name, str(current_load), str(requested_load)] for name, current_load, requested_load in self.metadata['faculties']]
+
+    def students_preferences(self) -> List[List[str]]:
+        """
+        :return: The students preferences in the form returned by read_students_preferences, for the code that works on names.
+        """
+        faculty_names: List[str] = self.faculty_names
+        return [list(self.student(index)) + [faculty_names[faculty_id] if faculty_id >= 0 else '' for faculty_id in self.preference_ids(index)]
+                for index in range(self.student_count)]
+
+    def assignment_result(self, assigned: Sequence[int]) -> List[Tuple[str, str, str]]:
+        """
+        Convert the faculty IDs returned by assign_cached_students to the (student_name, student_ID, assigned_faculty) tuples returned by
+        assign_students_to_faculties.
+        """
+        return [self.student(index)[:2] + (self.faculty_names[faculty_id],) for index, faculty_id in enumerate(assigned) if faculty_id >= 0]
+
+
+def load_inputs(students_path, faculties_path, cache_path=None, preference_count: int = 14) -> CachedInputs:
+    """
+    Open the cache of two input files, and build it first if it is missing, was built from other versions of the files or cannot be read.
+    :param students_path: The path to the file containing student preferences.
+    :param faculties_path: The path to the file containing faculty information.
+    :param cache_path: The path of the cache file, by default the students preferences file with a .cache suffix.
+    :param preference_count: The number of preferences of each student.
+    :return: The memory-mapped inputs.
+    """
+    if cache_path is None:
+        cache_path = f'{students_path}.cache'
+    if os.path.exists(cache_path):
+        try:
+            inputs: CachedInputs = CachedInputs(cache_path)
+        except (OSError, ValueError, KeyError, struct.error) as error:
+            print(f"Rebuilding the cache {cache_path}: {error}")
+        else:
+            if inputs.is_fresh(students_path, faculties_path, preference_count):
+                return inputs
+            inputs.close()
+    build_cache(students_path, faculties_path, cache_path, preference_count)
+    return CachedInputs(cache_path)
+
+
+class _LazyStudent:
+    """
+    A student of a cache that is only decoded when its name or ID is read, e.g. by the instrumentation.
+    """
+    __slots__ = ('inputs', 'index')
+
+    def __init__(self, inputs: CachedInputs, index: int) -> None:
+        self.inputs: CachedInputs = inputs
+        self.index: int = index
+
+    def __getitem__(self, field: int) -> str:
+        return self.inputs.student(self.index)[field]
+
+
+def assign_cached_students(inputs: CachedInputs, rng: Optional[random.Random] = None,
+                           instrumentation: Optional[Instrumentation] = None) -> Tuple[array, List[List[str]]]:
+    """
+    Assign the students of a cache with the rules of assign_students_to_faculties, directly on the faculty IDs of the preferences matrix.
+    The same inputs and seed give the same assignment as assign_students_to_faculties on the parsed files.
+    :param inputs: The memory-mapped inputs.
+    :param rng: The random number generator used to break ties. If not given, the global one is used.
+    :param instrumentation: If given, the branch taken by each student and the faculty comparisons are counted in it.
+    :return: The faculty ID assigned to each student (-1 if there is no faculty), and the faculties information with the updated loads.
+    """
+    faculties_info: List[List[str]] = inputs.faculties_info()
+    registry: FacultyRegistry = FacultyRegistry(faculties_info)
+    assigner: GreedyAssigner = GreedyAssigner(registry, [], rng, instrumentation)
+    for index in range(len(inputs)):
+        assigner.add_future_slots(inputs.preference_ids(index))
+    assigned: array = array('i')
+    for index in range(len(inputs)):
+        preference_ids: memoryview = inputs.preference_ids(index)
+        assigner.remove_future_slots(preference_ids)
+        # The name and ID of the student are only decoded when they are needed
+        student: Sequence[str] = _LazyStudent(inputs, index)
+        slot: Optional[int] = assigner.assign_slots(student, preference_ids)
+        if slot is None:
+            print(f"No available faculty for student {student[0]} with ID {student[1]}.")
+            slot = -1
+        assigned.append(slot)
+    registry.sync()
+    return assigned, faculties_info
+
+
+def compute_cached_statistics(inputs: CachedInputs, assigned: Sequence[int]) -> AssignmentStatistics:
+    """
+    Compute the statistics of compute_statistics from the faculty IDs returned by assign_cached_students, without parsing the names.
+    :param inputs: The memory-mapped inputs.
+    :param assigned: The faculty ID assigned to each student, -1 if there is no faculty.
+    :return: The statistics of the assignment result.
+    """
+    preference_count: int = inputs.preference_count
+    preference_counts: Dict[int, int] = {preference: 0 for preference in range(1, preference_count + 1)}
+    students_without_preference: List[Tuple[str, str, str]] = []
+    students_by_preference: Dict[int, List[Tuple[str, str, str]]] = {preference: [] for preference in range(1, preference_count + 1)}
+    for index, faculty_id in enumerate(assigned):
+        if faculty_id < 0:
+            continue
+        row: Tuple[str, str, str] = inputs.student(index)[:2] + (inputs.faculty_names[faculty_id],)
+        try:
+            # A student who listed the assigned faculty more than once is counted at the first (best) preference only
+            preference_index: int = inputs.preference_ids(index).tolist().index(faculty_id) + 1
+        except ValueError:
+            # Faculty not in student's preference list (assigned due to fallback algorithm)
+            students_without_preference.append(row)
+            continue
+        preference_counts[preference_index] += 1
+        students_by_preference[preference_index].append(row)
+    return AssignmentStatistics(preference_count, preference_counts, students_without_preference, students_by_preference)
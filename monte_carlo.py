@@ -0,0 +1,124 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from statistics import fmean, pstdev
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from assign import AssignmentStatistics, assign_students_to_faculties, compute_statistics
+
+
+class RunMetrics(NamedTuple):
+    """
+    The quality metrics of one seeded run of assign_students_to_faculties.
+    """
+    seed: int
+    rank_histogram: Dict[int, int]  # preference rank -> number of students assigned to that preference
+    outside_preferences: int  # number of students assigned to a faculty not in their preferences
+    total_rank_cost: int  # see AssignmentStatistics.total_rank_cost
+    load_spread: int  # the highest minus the lowest current load of the faculties after the run
+
+    def quality_key(self) -> Tuple[int, int, int, int]:
+        """
+        The key to sort runs from best to worst: fewest students outside their preferences, then lowest total rank cost,
+        then the most balanced loads. The seed breaks the remaining ties so that the best run does not depend on the order of the runs.
+        """
+        return (self.outside_preferences, self.total_rank_cost, self.load_spread, self.seed)
+
+
+class MetricSummary(NamedTuple):
+    """
+    The distribution of a metric over all the runs.
+    """
+    minimum: float
+    mean: float
+    maximum: float
+    stdev: float
+
+
+class MonteCarloResult(NamedTuple):
+    """
+    The result of run_monte_carlo.
+    """
+    best_run: RunMetrics
+    assignment_result: List[Tuple[str, str, str]]  # the assignment of the best run, reproduced from its seed
+    faculties_info: List[List[str]]  # the updated faculties information of the best run
+    runs: List[RunMetrics]  # the metrics of all the runs, in the order of their seeds
+    summaries: Dict[str, MetricSummary]  # metric name -> distribution over the runs
+    mean_rank_histogram: Dict[int, float]  # preference rank -> mean number of students assigned to that preference
+
+
+# The inputs of the runs, set once in each worker process by _init_worker instead of being sent with every run
+_students_preferences: List[List[str]] = []
+_faculties_info: List[List[str]] = []
+
+
+def _init_worker(students_preferences: List[List[str]], faculties_info: List[List[str]]) -> None:
+    global _students_preferences, _faculties_info
+    _students_preferences = students_preferences
+    _faculties_info = faculties_info
+
+
+def _seeded_run(students_preferences: List[List[str]], faculties_info: List[List[str]],
+                seed: int) -> Tuple[List[Tuple[str, str, str]], List[List[str]], RunMetrics]:
+    """
+    Run assign_students_to_faculties on a copy of faculties_info with a random number generator seeded with `seed`.
+    :return: The assignment result, the updated copy of faculties_info and the metrics of the run.
+    """
+    faculties_copy: List[List[str]] = [list(faculty) for faculty in faculties_info]
+    assignment_result: List[Tuple[str, str, str]] = assign_students_to_faculties(students_preferences, faculties_copy, random.Random(seed))
+    stats: AssignmentStatistics = compute_statistics(assignment_result, students_preferences)
+    loads: List[int] = [int(faculty[1]) for faculty in faculties_copy]
+    metrics: RunMetrics = RunMetrics(seed, {preference: count for preference, count in stats.preference_counts.items()},
+                                     len(stats.students_without_preference), stats.total_rank_cost,
+                                     max(loads) - min(loads) if loads else 0)
+    return assignment_result, faculties_copy, metrics
+
+
+def _run_metrics(seed: int) -> RunMetrics:
+    # Only the metrics are sent back to the parent process, the best run is reproduced there from its seed
+    return _seeded_run(_students_preferences, _faculties_info, seed)[2]
+
+
+def summarize(values: List[float]) -> MetricSummary:
+    """
+    Summarize the distribution of a metric over the runs.
+    """
+    return MetricSummary(min(values), fmean(values), max(values), pstdev(values))
+
+
+def run_monte_carlo(students_preferences: List[List[str]], faculties_info: List[List[str]], runs: int, seed: int = 0,
+                    processes: Optional[int] = None) -> MonteCarloResult:
+    """
+    Run assign_students_to_faculties `runs` times with different random tie-breaks and keep the best run.
+    Run i uses a random number generator seeded with seed + i, so every run (and the whole batch) can be reproduced, and each run works on
+    its own copy of faculties_info, which is not modified. The runs are spread over a pool of processes.
+    :param students_preferences: A list of lists containing student preferences.
+    :param faculties_info: A list of lists containing faculty information.
+    :param runs: The number of runs.
+    :param seed: The seed of the first run.
+    :param processes: The number of worker processes, all the cores if not given. With 1, the runs are done in this process.
+    :return: The best run with its assignment, and the metrics and their distributions over all the runs.
+    """
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+    seeds: List[int] = [seed + run for run in range(runs)]
+    if processes == 1:
+        _init_worker(students_preferences, faculties_info)
+        run_metrics: List[RunMetrics] = [_run_metrics(run_seed) for run_seed in seeds]
+    else:
+        workers: int = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(students_preferences, faculties_info)) as executor:
+            # A few chunks per worker keeps the number of messages low and the work balanced
+            run_metrics = list(executor.map(_run_metrics, seeds, chunksize=max(1, runs // (4 * workers))))
+
+    best_run: RunMetrics = min(run_metrics, key=RunMetrics.quality_key)
+    assignment_result, faculties_copy, _ = _seeded_run(students_preferences, faculties_info, best_run.seed)
+    summaries: Dict[str, MetricSummary] = {
+        'outside_preferences': summarize([run.outside_preferences for run in run_metrics]),
+        'total_rank_cost': summarize([run.total_rank_cost for run in run_metrics]),
+        'load_spread': summarize([run.load_spread for run in run_metrics]),
+    }
+    mean_rank_histogram: Dict[int, float] = {preference: fmean([run.rank_histogram.get(preference, 0) for run in run_metrics])
+                                             for preference in best_run.rank_histogram}
+    return MonteCarloResult(best_run, assignment_result, faculties_copy, run_metrics, summaries, mean_rank_histogram)
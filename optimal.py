@@ -0,0 +1,287 @@
+from heapq import heappop, heappush
+from math import inf
+from typing import Dict, List, Optional, Set, Tuple
+
+from assign import FacultyRegistry
+
+
+def _load_cost(load: int, requested: int, tier_2_cost: int, overflow_cost: int) -> int:
+    """
+    The cost of giving a faculty one more student, so that its load becomes `load` and it still had `requested` requested load before.
+    The costs follow the same rules as the greedy assignment: a faculty takes students up to a load of 3 while it has requested load (free),
+    then up to a load of 4 while it has requested load (tier_2_cost), and only then any student above that (overflow_cost times the load, so
+    that the overflow goes to the least loaded faculties first). The costs are non-decreasing with the load, as min-cost flow needs.
+    """
+    if requested > 0 and load <= 3:
+        return 0
+    if requested > 0 and load <= 4:
+        return tier_2_cost
+    return overflow_cost * load
+
+
+def assign_students_optimally(students_preferences: List[List[str]], faculties_info: List[List[str]]) -> List[Tuple[str, str, str]]:
+    """
+    Assign students to faculties by solving a min-cost flow problem, so that the result does not depend on the order of the students.
+    Each student is a source of one unit of flow, which goes to one of their preferences (with a cost of rank - 1) or, if none of them
+    can take the student, to any faculty through an "outside preferences" node (with a cost of the number of preferences). Each faculty
+    passes the flow to the sink with the load costs of _load_cost, which are weighted so that the solution first uses the fewest students
+    above the load limits of 3 and 4 and then has the lowest total rank cost.
+    The problem is solved in primal-dual phases. Each phase runs Dijkstra's algorithm with node potentials from all the unassigned students
+    to the sink, updates the potentials so that the shortest paths have a reduced cost of 0, and then assigns as many students as it can
+    along paths of reduced cost 0 with a depth-first search (a blocking flow), which moves already assigned students to other faculties when
+    that is cheaper. The number of phases is the number of distinct path costs, about 40 for the generated cohorts, but each phase visits
+    most of the graph, so the time still grows faster than the number of students: about 0.4 s for 1,000 students, 7 s for 10,000 and
+    24 s for 30,000 (generate_cohort with a third as many faculties). For larger cohorts use assign_students_to_faculties.
+    Whenever a student is assigned to a faculty, the faculty's current load is incremented and its requested load is decremented, the same
+    as in assign_students_to_faculties.
+    :param students_preferences: A list of lists containing student preferences.
+    :param faculties_info: A list of lists containing faculty information.
+    :return: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty), in the order of the students.
+    """
+    registry: FacultyRegistry = FacultyRegistry(faculties_info)
+    student_count: int = len(students_preferences)
+    faculty_count: int = len(registry)
+    if faculty_count == 0:
+        for student in students_preferences:
+            print(f"No available faculty for student {student[0]} with ID {student[1]}.")
+        return []
+
+    preference_count: int = max((len(student) - 3 for student in students_preferences), default=14)
+    outside_cost: int = preference_count  # the cost of a faculty that is not in the student's preferences
+    tier_2_cost: int = student_count * outside_cost + 1  # more than any total rank cost
+    overflow_cost: int = (student_count + 1) * tier_2_cost  # more than any total tier 2 cost
+
+    # Nodes: students are 0..student_count-1, faculties are student_count + slot, then the outside preferences node and the sink
+    outside: int = student_count + faculty_count
+    sink: int = outside + 1
+    # For each student, the faculty nodes in their preferences and their costs (the best rank if a faculty is listed more than once)
+    arcs: List[Dict[int, int]] = []
+    for student in students_preferences:
+        student_arcs: Dict[int, int] = {}
+        for rank, preference in enumerate(student[3:]):
+            slot: Optional[int] = registry.slot_of(preference)
+            if slot is not None:
+                student_arcs.setdefault(student_count + slot, rank)
+        arcs.append(student_arcs)
+    arc_lists: List[List[Tuple[int, int]]] = [list(student_arcs.items()) for student_arcs in arcs]
+
+    assigned_to: List[int] = [-1] * student_count  # student -> faculty node, or the outside node
+    faculty_students: List[Dict[int, None]] = [{} for _ in range(faculty_count)]  # slot -> students assigned from their preferences
+    outside_students: Dict[int, None] = {}  # students assigned through the outside node
+    outside_flow: List[int] = [0] * faculty_count  # slot -> number of students assigned through the outside node
+    new_students: List[int] = [0] * faculty_count  # slot -> number of students assigned by the solver
+    # slot -> the cost of giving the faculty one more student
+    sink_cost: List[int] = [_load_cost(registry.current_load[slot] + 1, registry.requested_load[slot], tier_2_cost, overflow_cost)
+                            for slot in range(faculty_count)]
+    potential: List[int] = [0] * (sink + 1)
+
+    def neighbours(node: int) -> List[int]:
+        """
+        The nodes that a node may have an arc of the residual graph to. The arcs are checked with arc_cost when they are used, because
+        the residual graph changes as paths are applied.
+        """
+        if node < student_count:
+            # A student can go to any of their preferences or to the outside node
+            return list(arcs[node]) + [outside]
+        if node < outside:
+            # A faculty can take one more student, or give back one of its students or a student of the outside node
+            return [sink] + list(faculty_students[node - student_count]) + [outside]
+        # The outside node can give back one of its students (its arcs to the faculties are added by the caller)
+        return list(outside_students)
+
+    def arc_cost(node: int, neighbour: int) -> Optional[int]:
+        """
+        The cost of an arc of the residual graph, or None if there is no such arc.
+        """
+        if node < student_count:
+            # A student cannot go to the faculty (or the outside node) they are already assigned to
+            if assigned_to[node] == neighbour:
+                return None
+            return outside_cost if neighbour == outside else arcs[node][neighbour]
+        if node < outside:
+            slot: int = node - student_count
+            if neighbour == sink:
+                return sink_cost[slot]
+            if neighbour == outside:
+                return 0 if outside_flow[slot] > 0 else None
+            return -arcs[neighbour][node] if assigned_to[neighbour] == node else None
+        if neighbour < student_count:
+            return -outside_cost if assigned_to[neighbour] == outside else None
+        return 0
+
+    def apply_path(path: List[int]) -> None:
+        """
+        Move one unit of flow along a path of the residual graph, from an unassigned student to the sink.
+        """
+        for previous, node in zip(path, path[1:]):
+            if previous < student_count:
+                # The student moves to `node` (a faculty or the outside node)
+                if assigned_to[previous] == outside:
+                    del outside_students[previous]
+                elif assigned_to[previous] >= 0:
+                    del faculty_students[assigned_to[previous] - student_count][previous]
+                assigned_to[previous] = node
+                if node == outside:
+                    outside_students[previous] = None
+                else:
+                    faculty_students[node - student_count][previous] = None
+            elif previous == outside:
+                # The outside node gives a student to a faculty (or gives back one of its students, handled when that student moves)
+                if node >= student_count:
+                    outside_flow[node - student_count] += 1
+            elif node == sink:
+                slot: int = previous - student_count
+                new_students[slot] += 1
+                sink_cost[slot] = _load_cost(registry.current_load[slot] + new_students[slot] + 1, registry.requested_load[slot] - new_students[slot],
+                                             tier_2_cost, overflow_cost)
+            elif node == outside:
+                outside_flow[previous - student_count] -= 1
+
+    unassigned: List[int] = list(range(student_count))
+    while unassigned:
+        # Dijkstra's algorithm on the reduced costs, from all the unassigned students to the sink.
+        # The arcs are the same as those of neighbours and arc_cost, written out here because this loop is where the solver spends its time.
+        distance: List[float] = [inf] * (sink + 1)
+        for student in unassigned:
+            distance[student] = 0
+        finalized: List[int] = []
+        heap: List[Tuple[int, int]] = [(0, student) for student in unassigned]
+        while heap:
+            node_distance, node = heappop(heap)
+            if node_distance > distance[node]:
+                continue
+            if node == sink:
+                break
+            finalized.append(node)
+            base: int = node_distance + potential[node]
+            if node < student_count:
+                own: int = assigned_to[node]
+                for neighbour, cost in arc_lists[node]:
+                    if neighbour != own:
+                        new_distance: int = base + cost - potential[neighbour]
+                        if new_distance < distance[neighbour]:
+                            distance[neighbour] = new_distance
+                            heappush(heap, (new_distance, neighbour))
+                if own != outside:
+                    new_distance = base + outside_cost - potential[outside]
+                    if new_distance < distance[outside]:
+                        distance[outside] = new_distance
+                        heappush(heap, (new_distance, outside))
+            elif node < outside:
+                slot = node - student_count
+                new_distance = base + sink_cost[slot] - potential[sink]
+                if new_distance < distance[sink]:
+                    distance[sink] = new_distance
+                    heappush(heap, (new_distance, sink))
+                for student in faculty_students[slot]:
+                    new_distance = base - arcs[student][node] - potential[student]
+                    if new_distance < distance[student]:
+                        distance[student] = new_distance
+                        heappush(heap, (new_distance, student))
+                if outside_flow[slot] > 0:
+                    new_distance = base - potential[outside]
+                    if new_distance < distance[outside]:
+                        distance[outside] = new_distance
+                        heappush(heap, (new_distance, outside))
+            else:
+                # The outside node can go to any faculty, or give back one of its students
+                for neighbour in range(student_count, outside):
+                    new_distance = base - potential[neighbour]
+                    if new_distance < distance[neighbour]:
+                        distance[neighbour] = new_distance
+                        heappush(heap, (new_distance, neighbour))
+                for student in outside_students:
+                    new_distance = base - outside_cost - potential[student]
+                    if new_distance < distance[student]:
+                        distance[student] = new_distance
+                        heappush(heap, (new_distance, student))
+
+        # Update the potentials so that the reduced costs stay non-negative and the shortest paths have a reduced cost of 0.
+        # Every node should get min(distance, sink distance) added, which is the same as adding the sink distance to every node
+        # (a constant that cancels out) and removing the difference from the nodes closer than the sink.
+        sink_distance: int = distance[sink]
+        for node in finalized:
+            potential[node] -= sink_distance - distance[node]
+
+        # Augment along as many paths of reduced cost 0 as a depth-first search finds, so that one Dijkstra run serves many students.
+        # Each node keeps its list of neighbours and the position of its current arc for the whole phase: an arc is skipped for good once
+        # it has no reduced cost of 0 or leads to a dead end, and kept after a path went through it, since it may still be used.
+        # The outside node only has arcs of reduced cost 0 to the faculties with the same potential, which are listed once per phase.
+        adjacent: Dict[int, List[int]] = {outside: [student_count + slot for slot in range(faculty_count)
+                                                    if potential[student_count + slot] == potential[outside]] + list(outside_students)}
+        current: Dict[int, int] = {outside: 0}
+        # A node from which no path was found is dead for the rest of the phase, unless the search only failed because the path it was
+        # on blocked some of its arcs: then those arcs are kept and the node is searched again from the next student.
+        dead: Set[int] = set()
+        for source in unassigned:
+            if source in dead:
+                continue
+            path: List[int] = [source]
+            on_path: Set[int] = {source}
+            failed: Set[int] = set()  # the nodes that failed in the search from this student
+            while path:
+                node = path[-1]
+                if node not in adjacent:
+                    adjacent[node] = neighbours(node)
+                    current[node] = 0
+                node_neighbours: List[int] = adjacent[node]
+                index: int = current[node]
+                next_node: Optional[int] = None
+                blocked: List[int] = []
+                node_potential: int = potential[node]
+                end: int = len(node_neighbours)
+                while index < end:
+                    neighbour = node_neighbours[index]
+                    if neighbour not in dead and neighbour not in failed:
+                        cost: Optional[int] = arc_cost(node, neighbour)
+                        if cost is not None and cost + node_potential == potential[neighbour]:
+                            if neighbour not in on_path:
+                                next_node = neighbour
+                                break
+                            blocked.append(neighbour)
+                    index += 1
+                current[node] = index
+                if next_node is None:
+                    # Retreat, and skip the arc to this node in the previous node of the path
+                    path.pop()
+                    on_path.discard(node)
+                    if blocked:
+                        adjacent[node] = blocked
+                        current[node] = 0
+                        failed.add(node)
+                    else:
+                        dead.add(node)
+                    if path:
+                        if not blocked:
+                            current[path[-1]] += 1
+                        else:
+                            # The arc may lead to a path once this node is searched again, so it is moved to the end of the list
+                            previous_neighbours: List[int] = adjacent[path[-1]]
+                            previous_neighbours.append(previous_neighbours[current[path[-1]]])
+                            current[path[-1]] += 1
+                elif next_node == sink:
+                    path.append(sink)
+                    apply_path(path)
+                    # Every arc of the path now has a reverse arc of reduced cost 0, which may be behind the current arc of its node, so it is
+                    # added again at the end of the list (and a dead node can be searched again through it)
+                    for previous, node in zip(path, path[1:]):
+                        if node in adjacent:
+                            adjacent[node].append(previous)
+                            dead.discard(node)
+                    break
+                else:
+                    path.append(next_node)
+                    on_path.add(next_node)
+        unassigned = [student for student in unassigned if assigned_to[student] < 0]
+
+    # Give the students assigned through the outside node to the faculties that received that flow
+    outside_slots: List[int] = [slot for slot in range(faculty_count) for _ in range(outside_flow[slot])]
+    for student, slot in zip(outside_students, outside_slots):
+        assigned_to[student] = student_count + slot
+
+    assignment_result: List[Tuple[str, str, str]] = []
+    for student_index, student in enumerate(students_preferences):
+        faculty_name: str = registry.assign(assigned_to[student_index] - student_count)
+        assignment_result.append((student[0], student[1], faculty_name))
+    registry.sync()
+    return assignment_result
@@ -0,0 +1,176 @@
+import gzip
+import json
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+from assign import FacultyRegistry, GreedyAssigner
+
+
+class AssignmentSession:
+    """
+    A stateful assignment that takes small changes one at a time instead of rerunning the whole greedy assignment, so that the students
+    that are already placed keep their faculties: a late student is assigned with the same rules as assign_students_to_faculties, a student
+    who withdraws gives their place back, and a faculty that changes its requested load only moves the students above its new capacity.
+    The whole state (the loads, the assignments, the courtesy flag and the state of the random number generator) can be saved to a
+    compressed file and restored, so that the next change gives the same result as if the session had not been interrupted.
+    """
+
+    def __init__(self, faculties_info: List[List[str]], seed: Optional[int] = None) -> None:
+        """
+        Start an empty session.
+        :param faculties_info: A list of lists containing faculty information, it is copied and not modified.
+        :param seed: The seed of the random number generator used to break ties.
+        """
+        self.registry: FacultyRegistry = FacultyRegistry([list(faculty) for faculty in faculties_info])
+        self.rng: random.Random = random.Random(seed)
+        self.assigner: GreedyAssigner = GreedyAssigner(self.registry, [], self.rng)
+        self.students: Dict[str, List[str]] = {}  # student_ID -> student's preferences, in the order the students were assigned
+        self.assignments: Dict[str, Optional[int]] = {}  # student_ID -> slot of the assigned faculty, or None
+        self.faculty_students: List[Dict[str, None]] = [{} for _ in range(len(self.registry))]  # slot -> student_IDs, in the order they were assigned
+
+    def _record(self, student: List[str], slot: Optional[int]) -> None:
+        self.students[student[1]] = student
+        self.assignments[student[1]] = slot
+        if slot is not None:
+            self.faculty_students[slot][student[1]] = None
+
+    def assign_all(self, students_preferences: List[List[str]]) -> List[Tuple[str, str, str]]:
+        """
+        Assign a batch of students in order, the same as assign_students_to_faculties (the faculties in the preferences of the later
+        students of the batch are avoided in the last fallback).
+        :param students_preferences: A list of lists containing student preferences.
+        :return: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty).
+        """
+        # Every student of the batch is checked before any of them is assigned, so a rejected batch leaves the session unchanged
+        batch_IDs: Set[str] = set()
+        for student in students_preferences:
+            if student[1] in self.students:
+                raise ValueError(f"Student {student[0]} with ID {student[1]} is already in the session.")
+            if student[1] in batch_IDs:
+                raise ValueError(f"Student {student[0]} with ID {student[1]} appears more than once in the batch.")
+            batch_IDs.add(student[1])
+        for student in students_preferences:
+            self.assigner.add_future_student(student)
+        assignment_result: List[Tuple[str, str, str]] = []
+        for student in students_preferences:
+            self.assigner.remove_future_student(student)
+            slot: Optional[int] = self.assigner.assign_student(student)
+            self._record(student, slot)
+            if slot is None:
+                print(f"No available faculty for student {student[0]} with ID {student[1]}.")
+            else:
+                assignment_result.append((student[0], student[1], self.registry.names[slot]))
+        return assignment_result
+
+    def add_student(self, student: List[str]) -> Optional[str]:
+        """
+        Assign a late student, without moving any other student.
+        :param student: The student's preferences in the form [student_name, student_ID, average_GPA, 1st preference, 2nd preference, ...].
+        :return: The name of the assigned faculty, or None if there is no faculty.
+        """
+        if student[1] in self.students:
+            raise ValueError(f"Student {student[0]} with ID {student[1]} is already in the session.")
+        slot: Optional[int] = self.assigner.assign_student(student)
+        self._record(student, slot)
+        return self.registry.names[slot] if slot is not None else None
+
+    def withdraw_student(self, student_ID: str) -> Optional[str]:
+        """
+        Remove a student from the session and give their place back to their faculty (its current load is decremented and its
+        requested load is incremented). No other student is moved.
+        :param student_ID: The ID of the student.
+        :return: The name of the faculty the student was assigned to, or None if they had no faculty.
+        """
+        if student_ID not in self.students:
+            raise KeyError(f"There is no student with ID {student_ID} in the session.")
+        del self.students[student_ID]
+        slot: Optional[int] = self.assignments.pop(student_ID)
+        if slot is None:
+            return None
+        del self.faculty_students[slot][student_ID]
+        return self.registry.release(slot)
+
+    def update_faculty_capacity(self, faculty_name: str, requested_load: int) -> List[Tuple[str, str, str]]:
+        """
+        Change the requested load of a faculty. requested_load is the total number of students the faculty asks for in this session,
+        the same as in faculty_members.csv, so the students already assigned to the faculty are counted in it.
+        If the faculty now has more students than it asks for, the students assigned to it last are moved to other faculties with the
+        rules of assign_students_to_faculties. No other student is moved. If no other faculty can take them, the last fallback may still
+        pick the same faculty when it is one of the least loaded.
+        :param faculty_name: The name of the faculty.
+        :param requested_load: The new requested load of the faculty.
+        :return: A list of tuples (student_name, student_ID, assigned_faculty) of the students that were moved.
+        """
+        slot: Optional[int] = self.registry.slot_of(faculty_name)
+        if slot is None:
+            raise KeyError(f"There is no faculty {faculty_name} in the session.")
+        assigned_students: List[str] = list(self.faculty_students[slot])
+        self.registry.set_loads(slot, self.registry.current_load[slot], requested_load - len(assigned_students))
+        moved: List[Tuple[str, str, str]] = []
+        displaced: List[List[str]] = [self.students[student_ID] for student_ID in assigned_students[max(requested_load, 0):]]
+        for student in displaced:
+            self.withdraw_student(student[1])
+        for student in displaced:
+            faculty: Optional[str] = self.add_student(student)
+            if faculty is None:
+                print(f"No available faculty for student {student[0]} with ID {student[1]}.")
+            else:
+                moved.append((student[0], student[1], faculty))
+        return moved
+
+    def assignment_result(self) -> List[Tuple[str, str, str]]:
+        """
+        :return: A list of tuples, where each tuple contains (student_name, student_ID, assigned_faculty), in the order the students were assigned.
+        """
+        return [(student[0], student_ID, self.registry.names[self.assignments[student_ID]])
+                for student_ID, student in self.students.items() if self.assignments[student_ID] is not None]
+
+    def faculties_info(self) -> List[List[str]]:
+        """
+        :return: The faculties information with the current loads, in the form [faculty_name, current_load, requsted_load].
+        """
+        return [list(faculty) for faculty in self.registry.sync()]
+
+    def save(self, file_path) -> None:
+        """
+        Save the state of the session to a gzip-compressed JSON file.
+        :param file_path: The path of the file.
+        """
+        state: Dict = {
+            'version': 1,
+            'faculties': [[faculty[0], int(faculty[1]), int(faculty[2])] for faculty in self.registry.sync()],
+            'students': [student + [self.registry.names[self.assignments[student_ID]] if self.assignments[student_ID] is not None else None]
+                         for student_ID, student in self.students.items()],
+            # The order of the faculties in the load buckets decides which one a random tie-break picks, so it is saved as well
+            'by_load': [[load, bucket] for load, bucket in self.registry.by_load.buckets.items()],
+            'available': [[load, bucket] for load, bucket in self.registry.available.buckets.items()],
+            'courtesy': self.assigner.courtesy,
+            'rng': self.rng.getstate(),
+        }
+        with gzip.open(file_path, 'wt', encoding='utf-8') as file:
+            json.dump(state, file, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, file_path) -> 'AssignmentSession':
+        """
+        Restore a session saved with save().
+        :param file_path: The path of the file.
+        :return: The restored session.
+        """
+        with gzip.open(file_path, 'rt', encoding='utf-8') as file:
+            state: Dict = json.load(file)
+        if state.get('version') != 1:
+            raise ValueError(f"Unsupported session file version: {state.get('version')}")
+        session: AssignmentSession = cls([[name, str(current_load), str(requested_load)] for name, current_load, requested_load in state['faculties']])
+        for row in state['students']:
+            student: List[str] = row[:-1]
+            session._record(student, session.registry.slot_of(row[-1]) if row[-1] is not None else None)
+        for queue, buckets in ((session.registry.by_load, state['by_load']), (session.registry.available, state['available'])):
+            queue.clear()
+            for load, bucket in buckets:
+                for slot in bucket:
+                    queue.add(slot, load)
+        session.assigner.courtesy = state['courtesy']
+        version, internal_state, gauss_next = state['rng']
+        session.rng.setstate((version, tuple(internal_state), gauss_next))
+        return session
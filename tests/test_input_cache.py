@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from assign import assign_students_to_faculties, read_faculties_info, read_students_preferences
+from generate_data import write_cohort
+from input_cache import assign_cached_students, load_inputs
+
+
+@pytest.mark.parametrize('preference_count', [3, 14])
+@pytest.mark.parametrize('seed', range(3))
+def test_cached_assignment_matches_parsed_files(seed, preference_count, tmp_path):
+    students_path = tmp_path / 'Students_Preferences.csv'
+    faculties_path = tmp_path / 'faculty_members.csv'
+    cache_path = tmp_path / 'inputs.cache'
+    # Fewer places than students, so that the random tie-breaks of the last fallback are used
+    write_cohort(students_path, faculties_path, 300, 80, tightness=0.8, oversubscription=0.3, preference_count=preference_count, seed=seed)
+
+    faculties_info = read_faculties_info(faculties_path)
+    expected = assign_students_to_faculties(read_students_preferences(students_path, preference_count), faculties_info, random.Random(seed))
+
+    # The first call builds the cache and the second one reads it back
+    for _ in range(2):
+        with load_inputs(students_path, faculties_path, cache_path, preference_count) as inputs:
+            assigned, cached_faculties_info = assign_cached_students(inputs, random.Random(seed))
+            assert inputs.assignment_result(assigned) == expected
+        assert cached_faculties_info == faculties_info
@@ -0,0 +1,46 @@
+import itertools
+import random
+from typing import List
+
+import pytest
+
+from optimal import _load_cost, assign_students_optimally
+
+
+def total_cost(faculty_names: List[str], students_preferences: List[List[str]], faculties_info: List[List[str]], preference_count: int) -> int:
+    """
+    The cost that assign_students_optimally minimizes, for the faculty given to each student.
+    """
+    student_count: int = len(students_preferences)
+    tier_2_cost: int = student_count * preference_count + 1
+    overflow_cost: int = (student_count + 1) * tier_2_cost
+    cost: int = 0
+    new_students = {faculty[0]: 0 for faculty in faculties_info}
+    for student, faculty_name in zip(students_preferences, faculty_names):
+        preferences: List[str] = student[3:]
+        cost += preferences.index(faculty_name) if faculty_name in preferences else preference_count
+        new_students[faculty_name] += 1
+    for faculty_name, current_load, requested_load in faculties_info:
+        for count in range(new_students[faculty_name]):
+            cost += _load_cost(int(current_load) + count + 1, int(requested_load) - count, tier_2_cost, overflow_cost)
+    return cost
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_cost_matches_brute_force(seed):
+    rng = random.Random(seed)
+    faculty_count: int = rng.randint(1, 4)
+    student_count: int = rng.randint(1, 6)
+    preference_count: int = rng.randint(1, 3)
+    faculties_info = [[f"F{slot}", str(rng.randint(0, 4)), str(rng.randint(0, 3))] for slot in range(faculty_count)]
+    # A preference may be repeated or name a faculty that does not exist
+    names: List[str] = [faculty[0] for faculty in faculties_info] + ["Unknown"]
+    students_preferences = [[f"S{index}", str(index), "3.0"] + [rng.choice(names) for _ in range(preference_count)]
+                            for index in range(student_count)]
+
+    best: int = min(total_cost(list(faculty_names), students_preferences, faculties_info, preference_count)
+                    for faculty_names in itertools.product([faculty[0] for faculty in faculties_info], repeat=student_count))
+    result = assign_students_optimally(students_preferences, [list(faculty) for faculty in faculties_info])
+
+    assert [row[1] for row in result] == [student[1] for student in students_preferences]
+    assert total_cost([row[2] for row in result], students_preferences, faculties_info, preference_count) == best
@@ -0,0 +1,47 @@
+from typing import List
+
+import pytest
+
+from generate_data import generate_cohort
+from session import AssignmentSession
+
+
+def cohort(seed: int):
+    """
+    A cohort with few preferences and fewer places than students, so that the random tie-breaks of the last fallback are used.
+    """
+    students, faculties_info = generate_cohort(120, 60, tightness=0.8, oversubscription=0.3, preference_count=3, seed=seed)
+    students_preferences: List[List[str]] = [[student[1], student[2], student[5]] + student[6:] for student in students]
+    return students_preferences, faculties_info
+
+
+def apply_changes(session: AssignmentSession, students_preferences: List[List[str]], faculties_info: List[List[str]]) -> List:
+    """
+    Make the changes that follow the first batch, and return what each of them returned.
+    """
+    results: List = [session.add_student(student) for student in students_preferences[80:100]]
+    results.extend(session.withdraw_student(student[1]) for student in students_preferences[0:80:7])
+    results.append(session.update_faculty_capacity(faculties_info[0][0], 1))
+    results.append(session.update_faculty_capacity(faculties_info[1][0], 10))
+    results.append(session.assign_all(students_preferences[100:]))
+    return results
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_saved_session_continues_the_same(seed, tmp_path):
+    students_preferences, faculties_info = cohort(seed)
+
+    uninterrupted: AssignmentSession = AssignmentSession(faculties_info, seed)
+    uninterrupted.assign_all(students_preferences[:80])
+    expected: List = apply_changes(uninterrupted, students_preferences, faculties_info)
+
+    interrupted: AssignmentSession = AssignmentSession(faculties_info, seed)
+    interrupted.assign_all(students_preferences[:80])
+    interrupted.save(tmp_path / 'session.json.gz')
+    restored: AssignmentSession = AssignmentSession.load(tmp_path / 'session.json.gz')
+
+    assert restored.assignment_result() == interrupted.assignment_result()
+    assert restored.faculties_info() == interrupted.faculties_info()
+    assert apply_changes(restored, students_preferences, faculties_info) == expected
+    assert restored.assignment_result() == uninterrupted.assignment_result()
+    assert restored.faculties_info() == uninterrupted.faculties_info()